@@ -1,23 +1,41 @@
 """
 Pacote agents - Contém todos os agentes especializados do sistema.
+
+Os agentes são importados sob demanda (PEP 562): carregar o pacote, ou só o
+script de entrada, não importa o pandas nem os demais módulos até o primeiro
+acesso a um dos nomes abaixo.
 """
 
-from .base import Agent, AgentResponse
-from .desempenho import AnalisadorDesempenho
-from .engajamento import AnalisadorEngajamento
-from .diagnostico import AgenteDiagnostico
-from .validador import ValidadorHipoteses
-from .conselheiro import ConselheiroAcademico
-from .coordenador import CoordenadorAnalise
-
-__all__ = [
-    'Agent',
-    'AgentResponse',
-    'AnalisadorDesempenho',
-    'AnalisadorEngajamento',
-    'AgenteDiagnostico',
-    'ValidadorHipoteses',
-    'ConselheiroAcademico',
-    'CoordenadorAnalise'
-]
+from importlib import import_module
+
+# Nome exportado -> módulo que o define
+_EXPORTACOES = {
+    'Agent': '.base',
+    'AgentResponse': '.base',
+    'DesempenhoDetalhes': '.base',
+    'EngajamentoDetalhes': '.base',
+    'AnalisadorDesempenho': '.desempenho',
+    'AnalisadorEngajamento': '.engajamento',
+    'AgenteDiagnostico': '.diagnostico',
+    'HipoteseTag': '.diagnostico',
+    'ValidadorHipoteses': '.validador',
+    'ConselheiroAcademico': '.conselheiro',
+    'CoordenadorAnalise': '.coordenador'
+}
+
+__all__ = list(_EXPORTACOES)
+
+
+def __getattr__(nome):
+    """Importa o módulo que define 'nome' no primeiro acesso."""
+    modulo = _EXPORTACOES.get(nome)
+    if modulo is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+    valor = getattr(import_module(modulo, __name__), nome)
+    # Acessos seguintes não passam mais por aqui
+    globals()[nome] = valor
+    return valor
+
 
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,92 @@
+"""
+Módulo aceleracao.py - Compilação JIT opcional dos kernels numéricos.
+
+Quando o Numba está instalado, 'njit' compila as funções decoradas para
+código de máquina. Caso contrário, as mesmas funções rodam como Python puro,
+mantendo o Numba como dependência opcional. 'NUMBA_DISPONIVEL' permite escolher
+uma alternativa vetorizada em NumPy quando o laço em Python puro seria lento.
+
+O Numba só é importado na primeira chamada de um kernel decorado: importá-lo
+custa mais que a análise de um aluno, então as execuções que não passam pelos
+kernels de coorte não pagam esse custo.
+"""
+
+import importlib.util
+import threading
+import types
+from functools import wraps
+
+# Verifica a instalação sem importar o Numba
+NUMBA_DISPONIVEL = importlib.util.find_spec("numba") is not None
+
+# Nos kernels, 'prange' é um laço comum até a compilação pelo Numba
+prange = range
+
+# Evita que duas threads compilem o mesmo kernel ao mesmo tempo
+_trava_compilacao = threading.Lock()
+
+
+def njit(*args, **kwargs):
+    """
+    Compila a função decorada com 'numba.njit' na primeira chamada.
+
+    Aceita tanto '@njit' quanto '@njit(cache=True, parallel=True)'. Sem o
+    Numba, a função original é chamada sem alterações.
+    """
+    if len(args) == 1 and callable(args[0]) and not kwargs:
+        return _adiar_compilacao(args[0], {})
+
+    def decorador(funcao):
+        return _adiar_compilacao(funcao, kwargs)
+
+    return decorador
+
+
+def _adiar_compilacao(funcao, opcoes):
+    """Envolve 'funcao' para compilá-la apenas quando for chamada."""
+    compilada = None
+
+    @wraps(funcao)
+    def despachar(*args):
+        nonlocal compilada
+        if compilada is None:
+            with _trava_compilacao:
+                if compilada is None:
+                    compilada = _compilar(funcao, opcoes)
+        try:
+            return compilada(*args)
+        except ImportError:
+            # Kernels compilados não importam nada: o erro vem do cache em
+            # disco, gravado sob outro nome de pacote (diretório renomeado ou
+            # copiado). Esvazia o índice do cache e compila de novo
+            cache = getattr(compilada, '_cache', None)
+            if cache is None:
+                raise
+            with _trava_compilacao:
+                cache.flush()
+            return compilada(*args)
+
+    return despachar
+
+
+def _compilar(funcao, opcoes):
+    """
+    Compila 'funcao' com o Numba, se instalado.
+
+    A função é recriada com 'prange' apontando para 'numba.prange', que o Numba
+    reconhece como laço paralelo; o código (e o cache em disco) é o mesmo.
+    """
+    if not NUMBA_DISPONIVEL:
+        return funcao
+
+    import numba
+
+    globais = dict(funcao.__globals__, prange=numba.prange)
+    copia = types.FunctionType(
+        funcao.__code__, globais, funcao.__name__,
+        funcao.__defaults__, funcao.__closure__
+    )
+    copia.__qualname__ = funcao.__qualname__
+    copia.__module__ = funcao.__module__
+    copia.__doc__ = funcao.__doc__
+    return numba.njit(**opcoes)(copia)
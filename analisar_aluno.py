@@ -8,18 +8,59 @@ e retorna uma análise completa em formato JSON.
 
 #!Uso:
    python analisar_aluno.py --arquivo historico_academico.csv --id alu_101
+   python analisar_aluno.py --arquivo historico_academico.csv --ids-file ids.txt
 """
 
 import argparse
 import json
 import sys
 import os
-from pathlib import Path
 
-# Adiciona o diretório src ao path para importar os módulos
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+# orjson (extensão em C) é opcional: sem ele, usa o json da biblioteca padrão
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Executado como script, o arquivo não pertence a nenhum pacote: carrega o
+# diretório como pacote a partir do próprio caminho e o declara (PEP 366)
+# para que os imports relativos carreguem os agentes uma única vez, pelo
+# nome real do pacote. O diretório pai não entra no sys.path, então pastas
+# vizinhas não ocultam as dependências instaladas. O '__init__' do pacote
+# importa os agentes sob demanda, então registrá-lo aqui continua barato
+if __name__ == '__main__' and not __package__:
+    import importlib.util
+    
+    _diretorio = os.path.dirname(os.path.abspath(__file__))
+    __package__ = os.path.basename(_diretorio)
+    if __package__ not in sys.modules:
+        _especificacao = importlib.util.spec_from_file_location(
+            __package__,
+            os.path.join(_diretorio, '__init__.py'),
+            submodule_search_locations=[_diretorio]
+        )
+        _pacote = importlib.util.module_from_spec(_especificacao)
+        sys.modules[__package__] = _pacote
+        _especificacao.loader.exec_module(_pacote)
+
+def imprimir_json(dados) -> None:
+    """
+    Imprime os dados como JSON indentado, em UTF-8.
+    
+    Args:
+        dados: Estrutura serializável (dicionário ou lista de dicionários)
+    """
+    if orjson is None:
+        print(json.dumps(dados, indent=2, ensure_ascii=False))
+        return
+    
+    sys.stdout.flush()
+    sys.stdout.buffer.write(orjson.dumps(
+        dados,
+        option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE
+    ))
+    sys.stdout.flush()
 
-from __init__ import CoordenadorAnalise
 
 def main():
     """
@@ -36,12 +77,19 @@ def main():
         help='Caminho para o arquivo CSV com histórico acadêmico'
     )
     
-    parser.add_argument(
+    # Um único aluno (--id) ou um lote de alunos (--ids-file)
+    grupo_alunos = parser.add_mutually_exclusive_group(required=True)
+    
+    grupo_alunos.add_argument(
         '--id',
-        required=True,
         help='ID do aluno a ser analisado'
     )
     
+    grupo_alunos.add_argument(
+        '--ids-file',
+        help='Arquivo com um ID de aluno por linha; imprime um array JSON'
+    )
+    
     # Faz o parse dos argumentos
     args = parser.parse_args()
     
@@ -50,10 +98,30 @@ def main():
         print(f"Erro: Arquivo '{args.arquivo}' não encontrado.", file=sys.stderr)
         sys.exit(1)
     
+    if args.ids_file and not os.path.exists(args.ids_file):
+        print(f"Erro: Arquivo '{args.ids_file}' não encontrado.", file=sys.stderr)
+        sys.exit(1)
+    
+    # Importado só após o parse: '--help' não paga o custo de carregar o pandas
+    from .coordenador import CoordenadorAnalise
+    
     try:
         # Cria uma instância do coordenador
         coordenador = CoordenadorAnalise(args.arquivo)
         
+        # Modo lote: dataset e índices carregados uma única vez para todos
+        if args.ids_file:
+            with open(args.ids_file, encoding='utf-8') as arquivo_ids:
+                ids = [linha.strip() for linha in arquivo_ids if linha.strip()]
+            
+            resultados = coordenador.analisar_muitos(ids)
+            imprimir_json(resultados)
+            
+            # Sinaliza falha se algum aluno não pôde ser analisado
+            if any('erro' in resultado for resultado in resultados):
+                sys.exit(1)
+            return
+        
         # Executa a análise
         resultado = coordenador.analisar({'id_aluno': args.id})
         
@@ -64,7 +132,7 @@ def main():
         
         # Imprime o JSON final
         json_final = resultado.detalhes
-        print(json.dumps(json_final, indent=2, ensure_ascii=False))
+        imprimir_json(json_final)
         
     except Exception as e:
         print(f"Erro ao executar análise: {str(e)}", file=sys.stderr)
@@ -6,24 +6,79 @@ herdam. Cada agente é responsável por uma tarefa específica na análise do al
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
-from pydantic import BaseModel
+from dataclasses import dataclass, field, replace
+from typing import Dict, Any, List, Optional, Tuple, Type, Union
 
 
-class AgentResponse(BaseModel):
+@dataclass(slots=True, frozen=True)
+class DesempenhoDetalhes:
+    """
+    Detalhes produzidos pelo Analisador de Desempenho.
+    
+    Registro imutável lido por atributo pelos agentes seguintes; os valores
+    padrão equivalem a um aluno sem notas registradas.
+    
+    Atributos:
+        media_atual: Média geral do semestre atual
+        media_anterior: Média geral do semestre anterior
+        queda_rendimento: Diferença entre a média anterior e a atual
+        disciplinas_criticas: Disciplinas com média abaixo de 6.0
+    """
+    media_atual: float = 0.0
+    media_anterior: float = 0.0
+    queda_rendimento: float = 0.0
+    disciplinas_criticas: List[str] = field(default_factory=list)
+
+
+@dataclass(slots=True, frozen=True)
+class EngajamentoDetalhes:
+    """
+    Detalhes produzidos pelo Analisador de Engajamento.
+    
+    Registro imutável lido por atributo pelos agentes seguintes; os valores
+    padrão equivalem a um aluno com presença integral.
+    
+    Atributos:
+        percentual_presenca: Percentual de presença nas aulas (0-100)
+        total_ausencias: Número total de faltas
+        ausencias_por_disciplina: Faltas por disciplina, na ordem da primeira ausência
+    """
+    percentual_presenca: float = 100.0
+    total_ausencias: int = 0
+    ausencias_por_disciplina: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass(slots=True, frozen=True)
+class AgentResponse:
     """
     Modelo que padroniza a resposta de cada agente.
     
+    Dataclass imutável com __slots__: mais leve que um modelo validado,
+    já que cada aluno analisado gera várias respostas.
+    
     Atributos:
         agent_name: Nome do agente que gerou a resposta
         status: Status da execução ('sucesso' ou 'erro')
         resultado: O resultado principal da análise
-        detalhes: Informações adicionais sobre o processo
+        detalhes: Informações adicionais sobre o processo (dicionário, ou o
+            registro de detalhes dos analistas de desempenho e engajamento)
     """
     agent_name: str
     status: str
     resultado: str
-    detalhes: Optional[Dict[str, Any]] = None
+    detalhes: Optional[Union[Dict[str, Any], DesempenhoDetalhes, EngajamentoDetalhes]] = None
+    
+    def com_mensagem(self, mensagem: str) -> "AgentResponse":
+        """
+        Completa uma resposta-modelo de erro com a mensagem do problema.
+        
+        Args:
+            mensagem: Descrição do erro, anexada ao prefixo em 'resultado'
+            
+        Returns:
+            AgentResponse: Cópia do modelo com o resultado e os detalhes do erro
+        """
+        return replace(self, resultado=f"{self.resultado}: {mensagem}", detalhes={"erro": mensagem})
 
 
 class Agent(ABC):
@@ -34,6 +89,9 @@ class Agent(ABC):
     devem herdar desta classe e implementar o método 'analisar'.
     """
     
+    # Prefixo das mensagens de erro; cada agente define o seu
+    PREFIXO_ERRO = "Erro na análise"
+    
     def __init__(self, nome: str):
         """
         Inicializa um agente.
@@ -42,6 +100,13 @@ class Agent(ABC):
             nome: Nome único do agente
         """
         self.nome = nome
+        
+        # Resposta-modelo de erro, montada uma única vez por agente
+        self._modelo_erro = AgentResponse(
+            agent_name=nome,
+            status="erro",
+            resultado=self.PREFIXO_ERRO
+        )
     
     @abstractmethod
     def analisar(self, dados: Dict[str, Any]) -> AgentResponse:
@@ -55,4 +120,63 @@ class Agent(ABC):
             AgentResponse: Resposta padronizada do agente
         """
         pass
-
+    
+    def _responder_erro(self, erro: Union[str, Exception]) -> AgentResponse:
+        """
+        Monta a resposta de erro padronizada do agente.
+        
+        Args:
+            erro: Mensagem ou exceção que descreve o problema
+            
+        Returns:
+            AgentResponse: Resposta com status 'erro'
+        """
+        return self._modelo_erro.com_mensagem(str(erro))
+    
+    def _analisar_isolado(self, dados: Dict[str, Any]) -> AgentResponse:
+        """
+        Executa 'analisar' convertendo qualquer exceção em resposta de erro.
+        
+        Usado pelos caminhos de coorte: a falha de um aluno não derruba os demais.
+        
+        Args:
+            dados: Dicionário de entrada do agente
+            
+        Returns:
+            AgentResponse: Resposta de 'analisar', ou de erro se ela falhar
+        """
+        try:
+            return self.analisar(dados)
+        except Exception as e:
+            return self._responder_erro(e)
+    
+    def _exigir_tipo(
+        self,
+        dados: Dict[str, Any],
+        chave: str,
+        tipos: Union[Type, Tuple[Type, ...]],
+        descricao: str
+    ) -> Optional[AgentResponse]:
+        """
+        Verifica o tipo de uma entrada antes da análise.
+        
+        Chaves ausentes são aceitas (o agente usa seu valor padrão).
+        
+        Args:
+            dados: Dicionário de entrada do agente
+            chave: Chave a verificar
+            tipos: Tipo(s) aceito(s) para o valor
+            descricao: Descrição do tipo esperado, usada na mensagem
+            
+        Returns:
+            Optional[AgentResponse]: Resposta de erro, ou None se a entrada é válida
+        """
+        if chave in dados and not isinstance(dados[chave], tipos):
+            return self._responder_erro(
+                f"'{chave}' deve ser {descricao}, recebido {type(dados[chave]).__name__}"
+            )
+        return None
+    
+    def _exigir_lista(self, dados: Dict[str, Any], chave: str) -> Optional[AgentResponse]:
+        """Exige que 'dados[chave]', se informado, seja uma lista."""
+        return self._exigir_tipo(dados, chave, (list, tuple), "uma lista")
@@ -5,8 +5,9 @@ Este agente recebe o diagnóstico final validado e escolhe a ação mais
 precisa em um "playbook" de intervenções pedagógicas.
 """
 
+from functools import lru_cache
 from typing import Dict, Any
-from .base import Agent, AgentResponse
+from .base import Agent, AgentResponse, DesempenhoDetalhes, EngajamentoDetalhes
 
 
 class ConselheiroAcademico(Agent):
@@ -21,33 +22,36 @@ class ConselheiroAcademico(Agent):
     """
     
     # Playbook de intervenções pedagógicas
+    # Os templates usam placeholders de str.format: {nome_aluno} e {id_aluno}
     PLAYBOOK = {
         "PB_PEDAG_01": {
             "titulo": "Acompanhamento Geral Intensivo",
             "descricao": "Programa de acompanhamento semanal com coordenador",
             "canal": "Sistema Acadêmico / E-mail do Coordenador",
-            "template": "ALERTA: Aluno [Nome] (ID: {id_aluno}) apresentou sinais de desengajamento geral. Sugestão: Acompanhamento semanal com o coordenador do curso."
+            "template": "ALERTA: Aluno {nome_aluno} (ID: {id_aluno}) apresentou sinais de desengajamento geral. Sugestão: Acompanhamento semanal com o coordenador do curso."
         },
         "PB_PEDAG_02": {
             "titulo": "Agendar Reunião de Apoio Pedagógico Focado",
             "descricao": "Reunião com foco em disciplina específica",
             "canal": "Sistema Acadêmico / E-mail do Coordenador",
-            "template": "ALERTA: Aluno [Nome] (ID: {id_aluno}) apresentou sinais de dificuldade pontual. Sugestão: Coordenador do curso deve convidá-lo para uma conversa e oferecer tutoria específica para a disciplina crítica."
+            "template": "ALERTA: Aluno {nome_aluno} (ID: {id_aluno}) apresentou sinais de dificuldade pontual. Sugestão: Coordenador do curso deve convidá-lo para uma conversa e oferecer tutoria específica para a disciplina crítica."
         },
         "PB_PEDAG_03": {
             "titulo": "Oferecer Tutoria Especializada",
             "descricao": "Tutoria com especialista na disciplina",
             "canal": "Sistema Acadêmico / E-mail do Tutor",
-            "template": "ALERTA: Aluno [Nome] (ID: {id_aluno}) necessita de tutoria especializada. Sugestão: Tutor deve entrar em contato para oferecer sessões de reforço."
+            "template": "ALERTA: Aluno {nome_aluno} (ID: {id_aluno}) necessita de tutoria especializada. Sugestão: Tutor deve entrar em contato para oferecer sessões de reforço."
         },
         "PB_PEDAG_04": {
             "titulo": "Avaliação Psicopedagógica",
             "descricao": "Encaminhamento para avaliação especializada",
             "canal": "Sistema Acadêmico / E-mail do Psicopedagogo",
-            "template": "ALERTA: Aluno [Nome] (ID: {id_aluno}) apresenta sinais que sugerem necessidade de avaliação especializada. Sugestão: Encaminhar para psicopedagogo."
+            "template": "ALERTA: Aluno {nome_aluno} (ID: {id_aluno}) apresenta sinais que sugerem necessidade de avaliação especializada. Sugestão: Encaminhar para psicopedagogo."
         }
     }
     
+    PREFIXO_ERRO = "Erro ao recomendar ação"
+    
     def __init__(self):
         super().__init__("Conselheiro Acadêmico")
     
@@ -60,8 +64,8 @@ class ConselheiroAcademico(Agent):
                 - 'diagnostico': Diagnóstico validado
                 - 'id_aluno': ID do aluno
                 - 'nome_aluno': Nome do aluno
-                - 'detalhes_desempenho': Detalhes de desempenho
-                - 'detalhes_engajamento': Detalhes de engajamento
+                - 'detalhes_desempenho': DesempenhoDetalhes do AnalisadorDesempenho
+                - 'detalhes_engajamento': EngajamentoDetalhes do AnalisadorEngajamento
                 
         Returns:
             AgentResponse: Recomendação de ação
@@ -70,8 +74,8 @@ class ConselheiroAcademico(Agent):
             diagnostico = dados.get('diagnostico', '')
             id_aluno = dados.get('id_aluno', 'desconhecido')
             nome_aluno = dados.get('nome_aluno', 'Aluno')
-            detalhes_desempenho = dados.get('detalhes_desempenho', {})
-            detalhes_engajamento = dados.get('detalhes_engajamento', {})
+            detalhes_desempenho = dados.get('detalhes_desempenho') or DesempenhoDetalhes()
+            detalhes_engajamento = dados.get('detalhes_engajamento') or EngajamentoDetalhes()
             
             # Escolhe a ação apropriada
             acao = self._escolher_acao(
@@ -91,23 +95,18 @@ class ConselheiroAcademico(Agent):
                     "playbook_id": acao['playbook_id'],
                     "titulo": acao['titulo'],
                     "canal": acao['canal'],
-                    "template_mensagem": acao['template_mensagem']
+                    "template_mensagem": recomendacao['template_mensagem']
                 }
             )
         
         except Exception as e:
-            return AgentResponse(
-                agent_name=self.nome,
-                status="erro",
-                resultado=f"Erro ao recomendar ação: {str(e)}",
-                detalhes={"erro": str(e)}
-            )
+            return self._responder_erro(e)
     
     def _escolher_acao(
         self,
         diagnostico: str,
-        detalhes_desempenho: Dict[str, Any],
-        detalhes_engajamento: Dict[str, Any]
+        detalhes_desempenho: DesempenhoDetalhes,
+        detalhes_engajamento: EngajamentoDetalhes
     ) -> Dict[str, str]:
         """
         Escolhe a ação mais apropriada baseada no diagnóstico.
@@ -120,25 +119,59 @@ class ConselheiroAcademico(Agent):
         Returns:
             Dict: Ação escolhida do playbook
         """
-        queda_rendimento = detalhes_desempenho.get('queda_rendimento', 0)
-        percentual_presenca = detalhes_engajamento.get('percentual_presenca', 100)
-        disciplinas_criticas = detalhes_desempenho.get('disciplinas_criticas', [])
+        queda_rendimento = detalhes_desempenho.queda_rendimento
+        percentual_presenca = detalhes_engajamento.percentual_presenca
+        disciplinas_criticas = detalhes_desempenho.disciplinas_criticas
+        
+        # Quantiza as entradas nas faixas que a escolha realmente distingue
+        if percentual_presenca < 50:
+            faixa_presenca = 0
+        elif percentual_presenca < 70:
+            faixa_presenca = 1
+        elif percentual_presenca > 70:
+            faixa_presenca = 3
+        else:
+            faixa_presenca = 2
+        
+        return self._acao_por_perfil(
+            queda_rendimento > 3.0,
+            faixa_presenca,
+            min(len(disciplinas_criticas), 2)
+        )
+    
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _acao_por_perfil(
+        queda_critica: bool,
+        faixa_presenca: int,
+        quantidade_criticas: int
+    ) -> Dict[str, str]:
+        """
+        Escolhe a ação do playbook para um perfil quantizado (resultado em cache).
         
+        Args:
+            queda_critica: Se a queda de rendimento passa de 3.0 pontos
+            faixa_presenca: 0 (< 50%), 1 (< 70%), 2 (= 70%) ou 3 (> 70%)
+            quantidade_criticas: Número de disciplinas críticas (limitado a 2)
+            
+        Returns:
+            Dict: Ação escolhida do playbook (compartilhada; não deve ser alterada)
+        """
         # Lógica de escolha de ação
-        if queda_rendimento > 3.0 and percentual_presenca < 50:
+        if queda_critica and faixa_presenca == 0:
             # Situação crítica: desengajamento geral
             playbook_id = "PB_PEDAG_04"
-        elif len(disciplinas_criticas) == 1 and percentual_presenca > 70:
+        elif quantidade_criticas == 1 and faixa_presenca == 3:
             # Dificuldade específica em uma disciplina
             playbook_id = "PB_PEDAG_02"
-        elif len(disciplinas_criticas) > 1 and percentual_presenca < 70:
+        elif quantidade_criticas > 1 and faixa_presenca < 2:
             # Múltiplas disciplinas críticas com baixa frequência
             playbook_id = "PB_PEDAG_01"
         else:
             # Caso padrão: tutoria especializada
             playbook_id = "PB_PEDAG_03"
         
-        playbook = self.PLAYBOOK.get(playbook_id, self.PLAYBOOK["PB_PEDAG_02"])
+        playbook = ConselheiroAcademico.PLAYBOOK[playbook_id]
         
         return {
             "playbook_id": playbook_id,
@@ -164,9 +197,10 @@ class ConselheiroAcademico(Agent):
         Returns:
             Dict: Recomendação formatada
         """
-        template = acao['template_mensagem']
-        template = template.replace('[Nome]', nome_aluno)
-        template = template.replace('{id_aluno}', id_aluno)
+        template = acao['template_mensagem'].format_map({
+            'nome_aluno': nome_aluno,
+            'id_aluno': id_aluno
+        })
         
         return {
             "descricao": f"Recomendação: {acao['titulo']}",
@@ -3,22 +3,113 @@ Módulo coordenador.py - Coordenador de Análise (O Maestro).
 
 Este agente gerencia todo o fluxo de análise. Ele:
 1. Recebe o ID do aluno
-2. Convoca os especialistas em paralelo
+2. Convoca os especialistas em paralelo (Desempenho e Engajamento)
 3. Coleta os resultados
 4. Orquestra a validação
 5. Monta o relatório final
 """
 
-from typing import Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import os
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
 import pandas as pd
-from datetime import datetime
-from .base import Agent, AgentResponse
+from datetime import datetime, timezone
+from .base import Agent, AgentResponse, DesempenhoDetalhes, EngajamentoDetalhes
 from .desempenho import AnalisadorDesempenho
-from .engajamento import AnalisadorEngajamento
+from .engajamento import AnalisadorEngajamento, PRESENCA_DESCONHECIDA
 from .diagnostico import AgenteDiagnostico
 from .validador import ValidadorHipoteses
 from .conselheiro import ConselheiroAcademico
 
+# Faixas do score de risco: contribuição por queda (> limiar) e por presença (< limiar)
+_QUEDA_LIMIARES = np.array([1.0, 2.0, 3.0])
+_QUEDA_PONTOS = np.array([0, 20, 40, 50])
+_PRESENCA_LIMIARES = np.array([50.0, 70.0, 85.0])
+_PRESENCA_PONTOS = np.array([50, 30, 10, 0])
+
+
+def _score_risco(queda: float, percentual: float) -> int:
+    """Soma as contribuições das duas faixas sem cadeias de if/elif."""
+    score = (
+        _QUEDA_PONTOS[np.searchsorted(_QUEDA_LIMIARES, queda, side='left')] +
+        _PRESENCA_PONTOS[np.searchsorted(_PRESENCA_LIMIARES, percentual, side='right')]
+    )
+    return min(score, 100)
+
+
+def _data_atual() -> str:
+    """Instante atual em UTC no formato ISO 8601 ('2024-10-06T12:00:00Z')."""
+    return datetime.now(timezone.utc).isoformat(timespec='seconds').replace('+00:00', 'Z')
+
+
+# Colunas do CSV efetivamente usadas na análise
+COLUNAS_DATASET = [
+    'id_aluno',
+    'nome_aluno',
+    'id_disciplina',
+    'semestre_letivo',
+    'data_evento',
+    'tipo_evento',
+    'presenca',
+    'nota'
+]
+
+# Esquema explícito: evita a inferência de tipos do pandas
+TIPOS_DATASET = {
+    'id_aluno': 'string',
+    'nome_aluno': 'string',
+    'id_disciplina': 'category',
+    'semestre_letivo': 'float64',
+    'data_evento': 'string',
+    'tipo_evento': 'category',
+    'presenca': 'Int8',
+    'nota': 'float64'
+}
+
+# Diagnóstico chave por tipo de diagnóstico informado pelo validador
+_DIAGNOSTICOS_CHAVE = {
+    'pontual': "DIFICULDADE_PONTUAL_EM_DISCIPLINA_CRITICA",
+    'geral': "DESENGAJAMENTO_GERAL",
+    'instavel': "DESEMPENHO_INSTAVEL"
+}
+
+# Os agentes especializados não guardam estado: uma instância por processo
+# é compartilhada por todos os coordenadores
+_DESEMPENHO = AnalisadorDesempenho()
+_ENGAJAMENTO = AnalisadorEngajamento()
+_DIAGNOSTICO = AgenteDiagnostico()
+_VALIDADOR = ValidadorHipoteses()
+_CONSELHEIRO = ConselheiroAcademico()
+
+# Pool do processo para os dois especialistas independentes (desempenho e
+# engajamento) de cada análise: os coordenadores o compartilham, e as threads
+# são encerradas na saída do interpretador, sem um 'close' por coordenador
+_EXECUTOR = ThreadPoolExecutor(max_workers=2)
+
+
+@dataclass(slots=True, frozen=True)
+class _RetratoDataset:
+    """
+    Dataset preparado e seus índices, trocados juntos a cada recarga.
+    
+    Quem analisa um aluno lê um único retrato do início ao fim, então nunca
+    combina faixas de uma versão do CSV com o DataFrame de outra.
+    
+    Atributos:
+        df: Dataset ordenado por aluno
+        mascara_prova: Linhas de provas com nota válida
+        faixas_aluno: Aluno -> faixa [início, fim) de linhas contíguas
+        geracao: Contador de recargas; identifica a versão do dataset
+    """
+    df: pd.DataFrame
+    mascara_prova: np.ndarray
+    faixas_aluno: Dict[str, Tuple[int, int]]
+    geracao: int
+
+
 class CoordenadorAnalise(Agent):
     """
     Maestro que orquestra toda a análise multiagente.
@@ -30,31 +121,153 @@ class CoordenadorAnalise(Agent):
     - Monta o JSON final
     """
     
-    def agents(self, caminho_dataset: str):
+    # Número máximo de alunos analisados simultaneamente em lote
+    MAX_ALUNOS_PARALELOS = 8
+    
+    PREFIXO_ERRO = "Erro na orquestração"
+    
+    def __init__(
+        self,
+        caminho_dataset: Optional[str],
+        df: Optional[pd.DataFrame] = None
+    ):
         """
         Inicializa o coordenador.
         
         Args:
             caminho_dataset: Caminho para o arquivo CSV com dados dos alunos
+            df: Dataset já carregado; quando informado, o CSV não é lido
         """
-        super().agents("Coordenador de Análise")
+        super().__init__("Coordenador de Análise")
         self.caminho_dataset = caminho_dataset
-        self.df = None
-        self._carregar_dataset()
-        
-        # Inicializa os agentes especializados
-        self.analisador_desempenho = AnalisadorDesempenho()
-        self.analisador_engajamento = AnalisadorEngajamento()
-        self.agente_diagnostico = AgenteDiagnostico()
-        self.validador_hipoteses = ValidadorHipoteses()
-        self.conselheiro_academico = ConselheiroAcademico()
+        self._retrato: Optional[_RetratoDataset] = None
+        
+        # Cache de resultados por aluno, válido enquanto o CSV não mudar
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        self._cache_mtime = self._mtime_dataset()
+        self._cache_lock = threading.Lock()
+        
+        if df is None:
+            self._carregar_dataset()
+        else:
+            self._preparar_dataset(df)
+        
+        # Reutiliza os agentes especializados compartilhados
+        self.analisador_desempenho = _DESEMPENHO
+        self.analisador_engajamento = _ENGAJAMENTO
+        self.agente_diagnostico = _DIAGNOSTICO
+        self.validador_hipoteses = _VALIDADOR
+        self.conselheiro_academico = _CONSELHEIRO
+        
+        # Pool do processo para os especialistas independentes
+        self._executor = _EXECUTOR
+    
+    @classmethod
+    def from_shared_df(cls, df: pd.DataFrame) -> 'CoordenadorAnalise':
+        """
+        Cria um coordenador sobre um dataset já carregado, sem reler o CSV.
+        
+        Args:
+            df: Dataset com as colunas de COLUNAS_DATASET (não é modificado)
+            
+        Returns:
+            CoordenadorAnalise: Coordenador pronto para analisar
+        """
+        return cls(None, df=df)
+    
+    def _mtime_dataset(self) -> Optional[float]:
+        """
+        Retorna a data de modificação do CSV (None sem arquivo de origem).
+        
+        Se o arquivo não puder ser consultado, mantém a última data conhecida
+        para continuar servindo o dataset já carregado.
+        """
+        if self.caminho_dataset is None:
+            return None
+        try:
+            return os.stat(self.caminho_dataset).st_mtime
+        except OSError:
+            return getattr(self, '_cache_mtime', None)
+    
+    def _validar_cache(self):
+        """Recarrega o dataset e esvazia o cache se o CSV foi alterado."""
+        mtime = self._mtime_dataset()
+        if mtime == self._cache_mtime:
+            return
+        
+        with self._cache_lock:
+            if mtime != self._cache_mtime:
+                self._carregar_dataset()
+                self._cache.clear()
+                self._cache_mtime = mtime
     
     def _carregar_dataset(self):
         """Carrega o dataset CSV."""
         try:
-            self.df = pd.read_csv(self.caminho_dataset)
+            df = self._ler_csv()
         except Exception as e:
             raise Exception(f"Erro ao carregar dataset: {str(e)}")
+        
+        self._preparar_dataset(df)
+    
+    def _preparar_dataset(self, df: pd.DataFrame):
+        """
+        Ajusta os tipos e constrói os índices usados nas análises.
+        
+        Args:
+            df: Dataset carregado (não é modificado)
+        """
+        # Linhas sem ID não pertencem a nenhum aluno consultável
+        df = df.dropna(subset=['id_aluno'])
+        
+        # Presença ausente vira PRESENCA_DESCONHECIDA: a aula conta, mas não é
+        # presença nem falta; int8 reduz a memória percorrida.
+        # A ordenação estável por aluno deixa as linhas de cada aluno contíguas,
+        # mantendo a ordem original do arquivo dentro de cada aluno
+        df = df.assign(
+            presenca=df['presenca'].fillna(PRESENCA_DESCONHECIDA).astype('int8')
+        ).sort_values('id_aluno', kind='stable', ignore_index=True)
+        
+        # Provas com nota válida, calculado uma única vez para todo o dataset
+        mascara_prova = (
+            df['tipo_evento'].eq('prova') & df['nota'].notna()
+        ).to_numpy()
+        
+        # Índice aluno -> faixa [início, fim) de linhas contíguas
+        unicos, inicios, quantidades = np.unique(
+            df['id_aluno'].to_numpy(), return_index=True, return_counts=True
+        )
+        faixas_aluno = dict(zip(
+            unicos.tolist(),
+            zip(inicios.tolist(), (inicios + quantidades).tolist())
+        ))
+        
+        # Publica o novo retrato com uma única atribuição
+        geracao = 0 if self._retrato is None else self._retrato.geracao + 1
+        self._retrato = _RetratoDataset(df, mascara_prova, faixas_aluno, geracao)
+    
+    @property
+    def df(self) -> pd.DataFrame:
+        """Dataset preparado do retrato atual."""
+        return self._retrato.df
+    
+    def _ler_csv(self) -> pd.DataFrame:
+        """
+        Lê o CSV apenas com as colunas usadas e tipos explícitos.
+        
+        Usa o engine 'pyarrow' quando disponível, com fallback para o 'c'.
+        
+        Returns:
+            pd.DataFrame: Dataset carregado
+        """
+        opcoes = {
+            'usecols': COLUNAS_DATASET,
+            'dtype': TIPOS_DATASET
+        }
+        try:
+            return pd.read_csv(self.caminho_dataset, engine='pyarrow', **opcoes)
+        except ImportError:
+            return pd.read_csv(self.caminho_dataset, engine='c', **opcoes)
     
     def analisar(self, dados: Dict[str, Any]) -> AgentResponse:
         """
@@ -65,7 +278,8 @@ class CoordenadorAnalise(Agent):
                 - 'id_aluno': ID do aluno a analisar
                 
         Returns:
-            AgentResponse: Resultado completo da análise
+            AgentResponse: Resultado completo da análise. Consultas repetidas
+            ao mesmo aluno reaproveitam o JSON em cache (não deve ser alterado)
         """
         try:
             id_aluno = dados.get('id_aluno')
@@ -73,56 +287,68 @@ class CoordenadorAnalise(Agent):
             if not id_aluno:
                 raise ValueError("ID do aluno não fornecido")
             
+            # Reaproveita a análise já feita enquanto o CSV não mudar
+            self._validar_cache()
+            retrato = self._retrato
+            json_em_cache = self._cache.get(id_aluno)
+            if json_em_cache is not None:
+                return AgentResponse(
+                    agent_name=self.nome,
+                    status="sucesso",
+                    resultado="Análise completa realizada com sucesso",
+                    detalhes=json_em_cache
+                )
+            
+            # Data da análise: um único valor por chamada
+            data_analise = _data_atual()
+            
             # Extrai dados do aluno
-            dados_aluno = self._extrair_dados_aluno(id_aluno)
+            dados_aluno = self._extrair_dados_aluno(id_aluno, retrato)
             
             if not dados_aluno:
                 raise ValueError(f"Aluno {id_aluno} não encontrado")
             
-            # Executa análises em paralelo (simulado sequencialmente)
-            resultado_desempenho = self.analisador_desempenho.analisar(
+            # Executa os especialistas em paralelo: operam sobre fatias
+            # disjuntas dos dados e não compartilham estado
+            futuro_desempenho = self._executor.submit(
+                self.analisador_desempenho.analisar,
                 dados_aluno['dados_desempenho']
             )
             
-            resultado_engajamento = self.analisador_engajamento.analisar(
+            futuro_engajamento = self._executor.submit(
+                self.analisador_engajamento.analisar,
                 dados_aluno['dados_engajamento']
             )
             
-            # Formular diagnóstico
-            resultado_diagnostico = self.agente_diagnostico.analisar({
-                'relatorio_desempenho': resultado_desempenho,
-                'relatorio_engajamento': resultado_engajamento,
-                'detalhes_desempenho': resultado_desempenho.detalhes,
-                'detalhes_engajamento': resultado_engajamento.detalhes
-            })
+            resultado_desempenho = futuro_desempenho.result()
+            resultado_engajamento = futuro_engajamento.result()
             
-            # Validar hipótese
-            resultado_validacao = self.validador_hipoteses.analisar({
-                'hipotese': resultado_diagnostico.resultado,
-                'detalhes_desempenho': resultado_desempenho.detalhes,
-                'detalhes_engajamento': resultado_engajamento.detalhes
-            })
+            # Sem os detalhes dos analistas não há como seguir com o diagnóstico
+            for resultado_analista in (resultado_desempenho, resultado_engajamento):
+                if resultado_analista.status != "sucesso":
+                    raise ValueError(resultado_analista.resultado)
             
-            # Recomendar ação
-            resultado_acao = self.conselheiro_academico.analisar({
-                'diagnostico': resultado_validacao.resultado,
-                'id_aluno': id_aluno,
-                'nome_aluno': dados_aluno['nome_aluno'],
-                'detalhes_desempenho': resultado_desempenho.detalhes,
-                'detalhes_engajamento': resultado_engajamento.detalhes
-            })
+            # Formular diagnóstico
+            resultado_diagnostico = self.agente_diagnostico.analisar(
+                self._entrada_diagnostico(resultado_desempenho, resultado_engajamento)
+            )
             
-            # Monta o JSON final
-            json_final = self._montar_json_final(
+            # Valida a hipótese, recomenda a ação e monta o JSON final
+            json_final = self._concluir_analise(
                 id_aluno,
                 dados_aluno,
                 resultado_desempenho,
                 resultado_engajamento,
                 resultado_diagnostico,
-                resultado_validacao,
-                resultado_acao
+                data_analise
             )
             
+            # Só guarda o resultado se o dataset não foi recarregado durante
+            # a análise; do contrário ele refletiria o CSV antigo
+            with self._cache_lock:
+                if self._retrato.geracao == retrato.geracao:
+                    self._cache[id_aluno] = json_final
+            
             return AgentResponse(
                 agent_name=self.nome,
                 status="sucesso",
@@ -131,71 +357,304 @@ class CoordenadorAnalise(Agent):
             )
         
         except Exception as e:
-            return AgentResponse(
-                agent_name=self.nome,
-                status="erro",
-                resultado=f"Erro na orquestração: {str(e)}",
-                detalhes={"erro": str(e)}
+            return self._responder_erro(e)
+    
+    def analisar_muitos(self, ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Analisa vários alunos reaproveitando o dataset e os índices carregados.
+        
+        Os alunos sem análise em cache passam juntos pelos caminhos de coorte:
+        o engajamento de todos sai de uma única varredura dos eventos
+        ('analisar_lote') e as hipóteses de uma única classificação.
+        
+        Args:
+            ids: IDs dos alunos a analisar
+            
+        Returns:
+            List[Dict]: Um JSON final por aluno, na ordem dos IDs. Alunos cuja
+            análise falhou aparecem como {'idAluno': ..., 'erro': ...}
+        """
+        try:
+            self._validar_cache()
+        except Exception as e:
+            # Sem dataset, todos os alunos falham pelo mesmo motivo
+            erro = self._responder_erro(e).resultado
+            return [{"idAluno": id_aluno, "erro": erro} for id_aluno in ids]
+        retrato = self._retrato
+        
+        jsons: Dict[str, Dict[str, Any]] = {}
+        erros: Dict[str, str] = {}
+        pendentes: Dict[str, Dict[str, Any]] = {}
+        
+        # Separa os alunos já em cache e extrai os dados dos demais uma vez
+        for id_aluno in ids:
+            if id_aluno in jsons or id_aluno in erros or id_aluno in pendentes:
+                continue
+            try:
+                if not id_aluno:
+                    raise ValueError("ID do aluno não fornecido")
+                json_em_cache = self._cache.get(id_aluno)
+                if json_em_cache is not None:
+                    jsons[id_aluno] = json_em_cache
+                    continue
+                dados_aluno = self._extrair_dados_aluno(id_aluno, retrato, vetores_presenca=True)
+                if not dados_aluno:
+                    raise ValueError(f"Aluno {id_aluno} não encontrado")
+                pendentes[id_aluno] = dados_aluno
+            except Exception as e:
+                erros[id_aluno] = self._responder_erro(e).resultado
+        
+        # Uma falha inesperada no caminho de coorte não derruba o lote: cada
+        # aluno pendente é refeito por 'analisar', isoladamente
+        try:
+            novos = self._analisar_coorte(pendentes, erros, _data_atual())
+        except Exception:
+            novos = {}
+            for id_aluno in pendentes:
+                resultado = self.analisar({'id_aluno': id_aluno})
+                if resultado.status == "sucesso":
+                    novos[id_aluno] = resultado.detalhes
+                else:
+                    erros[id_aluno] = resultado.resultado
+        
+        # Mesmo critério de 'analisar': nada do CSV antigo entra no cache
+        with self._cache_lock:
+            if self._retrato.geracao == retrato.geracao:
+                self._cache.update(novos)
+        jsons.update(novos)
+        
+        return [
+            jsons[id_aluno] if id_aluno in jsons
+            else {"idAluno": id_aluno, "erro": erros[id_aluno]}
+            for id_aluno in ids
+        ]
+    
+    def _analisar_coorte(
+        self,
+        pendentes: Dict[str, Dict[str, Any]],
+        erros: Dict[str, str],
+        data_analise: str
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Analisa juntos os alunos já extraídos, pelos caminhos de coorte.
+        
+        Args:
+            pendentes: Dados extraídos de cada aluno, por ID
+            erros: Mensagens de erro por ID, completada com as falhas da coorte
+            data_analise: Data da análise, a mesma para todo o lote
+            
+        Returns:
+            Dict: JSON final de cada aluno analisado com sucesso, por ID
+        """
+        ids_pendentes = list(pendentes)
+        lista_dados = [pendentes[id_aluno] for id_aluno in ids_pendentes]
+        
+        # Desempenho de cada aluno no pool, enquanto o engajamento da coorte
+        # sai de uma única varredura. A varredura roda na thread chamadora: o
+        # kernel paralelo do Numba (camada TBB) disparado de outra thread
+        # impede o interpretador de encerrar
+        with ThreadPoolExecutor(max_workers=self.MAX_ALUNOS_PARALELOS) as executor:
+            resultados_desempenho = executor.map(
+                self.analisador_desempenho.analisar,
+                [dados_aluno['dados_desempenho'] for dados_aluno in lista_dados]
             )
+            resultados_engajamento = self.analisador_engajamento.analisar_lote(
+                [dados_aluno['dados_engajamento'] for dados_aluno in lista_dados]
+            )
+            resultados_desempenho = list(resultados_desempenho)
+        
+        # Sem os detalhes dos analistas não há como seguir com o diagnóstico
+        validos = []
+        for id_aluno, resultado_desempenho, resultado_engajamento in zip(
+            ids_pendentes, resultados_desempenho, resultados_engajamento
+        ):
+            falha = next(
+                (
+                    resultado_analista
+                    for resultado_analista in (resultado_desempenho, resultado_engajamento)
+                    if resultado_analista.status != "sucesso"
+                ),
+                None
+            )
+            if falha is not None:
+                erros[id_aluno] = self._responder_erro(falha.resultado).resultado
+            else:
+                validos.append((id_aluno, resultado_desempenho, resultado_engajamento))
+        
+        # Hipóteses da coorte em uma única classificação
+        resultados_diagnostico = self.agente_diagnostico.analisar_lote([
+            self._entrada_diagnostico(resultado_desempenho, resultado_engajamento)
+            for _, resultado_desempenho, resultado_engajamento in validos
+        ])
+        
+        novos: Dict[str, Dict[str, Any]] = {}
+        for (id_aluno, resultado_desempenho, resultado_engajamento), resultado_diagnostico in zip(
+            validos, resultados_diagnostico
+        ):
+            try:
+                novos[id_aluno] = self._concluir_analise(
+                    id_aluno,
+                    pendentes[id_aluno],
+                    resultado_desempenho,
+                    resultado_engajamento,
+                    resultado_diagnostico,
+                    data_analise
+                )
+            except Exception as e:
+                erros[id_aluno] = self._responder_erro(e).resultado
+        
+        return novos
+    
+    def _entrada_diagnostico(
+        self,
+        resultado_desempenho: AgentResponse,
+        resultado_engajamento: AgentResponse
+    ) -> Dict[str, Any]:
+        """
+        Monta a entrada do AgenteDiagnostico a partir dos relatórios dos analistas.
+        
+        Args:
+            resultado_desempenho: Resposta do AnalisadorDesempenho
+            resultado_engajamento: Resposta do AnalisadorEngajamento
+            
+        Returns:
+            Dict: Dados no formato aceito por 'AgenteDiagnostico.analisar'
+        """
+        return {
+            'relatorio_desempenho': resultado_desempenho,
+            'relatorio_engajamento': resultado_engajamento,
+            'detalhes_desempenho': resultado_desempenho.detalhes,
+            'detalhes_engajamento': resultado_engajamento.detalhes
+        }
     
-    def _extrair_dados_aluno(self, id_aluno: str) -> Dict[str, Any]:
+    def _concluir_analise(
+        self,
+        id_aluno: str,
+        dados_aluno: Dict[str, Any],
+        resultado_desempenho: AgentResponse,
+        resultado_engajamento: AgentResponse,
+        resultado_diagnostico: AgentResponse,
+        data_analise: str
+    ) -> Dict[str, Any]:
+        """
+        Valida a hipótese, recomenda a ação e monta o JSON final do aluno.
+        
+        Args:
+            id_aluno: ID do aluno
+            dados_aluno: Dados extraídos do aluno
+            resultado_desempenho: Resposta do AnalisadorDesempenho
+            resultado_engajamento: Resposta do AnalisadorEngajamento
+            resultado_diagnostico: Resposta do AgenteDiagnostico
+            data_analise: Data da análise (ISO 8601, UTC)
+            
+        Returns:
+            Dict: JSON final da análise
+        """
+        # Validar hipótese
+        resultado_validacao = self.validador_hipoteses.analisar({
+            'hipotese': resultado_diagnostico.resultado,
+            'tag_hipotese': (resultado_diagnostico.detalhes or {}).get('tag_hipotese'),
+            'detalhes_desempenho': resultado_desempenho.detalhes,
+            'detalhes_engajamento': resultado_engajamento.detalhes
+        })
+        
+        # Recomendar ação
+        resultado_acao = self.conselheiro_academico.analisar({
+            'diagnostico': resultado_validacao.resultado,
+            'id_aluno': id_aluno,
+            'nome_aluno': dados_aluno['nome_aluno'],
+            'detalhes_desempenho': resultado_desempenho.detalhes,
+            'detalhes_engajamento': resultado_engajamento.detalhes
+        })
+        
+        # Monta o JSON final
+        return self._montar_json_final(
+            id_aluno,
+            dados_aluno,
+            resultado_desempenho,
+            resultado_engajamento,
+            resultado_diagnostico,
+            resultado_validacao,
+            resultado_acao,
+            data_analise
+        )
+    
+    def _extrair_dados_aluno(
+        self,
+        id_aluno: str,
+        retrato: Optional[_RetratoDataset] = None,
+        vetores_presenca: bool = False
+    ) -> Dict[str, Any]:
         """
         Extrai todos os dados relevantes do aluno.
         
         Args:
             id_aluno: ID do aluno
+            retrato: Versão do dataset a consultar (padrão: a atual)
+            vetores_presenca: Entrega ao engajamento os vetores de presença das
+                aulas, em vez dos agregados, para a varredura da coorte
             
         Returns:
             Dict: Dados estruturados do aluno
         """
-        # Filtra dados do aluno
-        dados_aluno_df = self.df[self.df['id_aluno'] == id_aluno]
+        # Localiza a faixa do aluno pelo índice, sem varrer a coluna de IDs
+        if retrato is None:
+            retrato = self._retrato
+        faixa = retrato.faixas_aluno.get(id_aluno)
         
-        if dados_aluno_df.empty:
+        if faixa is None:
             return None
         
+        # Fatia contígua: visão das linhas, sem cópia por gather
+        inicio, fim = faixa
+        dados_aluno_df = retrato.df.iloc[inicio:fim]
+        
         # Extrai informações básicas
         nome_aluno = dados_aluno_df['nome_aluno'].iloc[0]
         
+        # Seleciona as provas com nota do aluno
+        provas = dados_aluno_df[retrato.mascara_prova[inicio:fim]]
+        
         # Separa por semestre
         semestre_atual = dados_aluno_df['semestre_letivo'].max()
-        semestres_anteriores = dados_aluno_df[
-            dados_aluno_df['semestre_letivo'] < semestre_atual
-        ]
         
-        # Extrai notas
-        notas_atuais = dados_aluno_df[
-            (dados_aluno_df['semestre_letivo'] == semestre_atual) &
-            (dados_aluno_df['tipo_evento'] == 'prova') &
-            (dados_aluno_df['nota'].notna())
-        ]['nota'].tolist()
-        
-        notas_anteriores = semestres_anteriores[
-            (semestres_anteriores['tipo_evento'] == 'prova') &
-            (semestres_anteriores['nota'].notna())
-        ]['nota'].tolist()
-        
-        # Extrai disciplinas e suas notas
-        disciplinas = {}
-        for disciplina in dados_aluno_df['id_disciplina'].unique():
-            notas_disciplina = dados_aluno_df[
-                (dados_aluno_df['id_disciplina'] == disciplina) &
-                (dados_aluno_df['tipo_evento'] == 'prova') &
-                (dados_aluno_df['nota'].notna())
-            ]['nota'].tolist()
-            if notas_disciplina:
-                disciplinas[disciplina] = notas_disciplina
-        
-        # Extrai eventos de presença
-        eventos = []
-        for _, row in dados_aluno_df[
-            dados_aluno_df['tipo_evento'] == 'aula'
-        ].iterrows():
-            eventos.append({
-                'presenca': row['presenca'],
-                'disciplina': row['id_disciplina'],
-                'data': row['data_evento']
-            })
+        # Separa as notas por semestre nos vetores numpy das provas; o
+        # desempenho recebe listas, cuja soma em Python é a mais barata
+        notas = provas['nota'].to_numpy(dtype=np.float64)
+        semestres = provas['semestre_letivo'].to_numpy()
+        notas_atuais = notas[semestres == semestre_atual].tolist()
+        notas_anteriores = notas[semestres < semestre_atual].tolist()
+        
+        aulas = dados_aluno_df.loc[
+            dados_aluno_df['tipo_evento'].eq('aula'),
+            ['presenca', 'id_disciplina']
+        ]
+        if vetores_presenca:
+            # Eventos na ordem do arquivo; a varredura da coorte os agrega
+            dados_engajamento = {
+                'presencas': aulas['presenca'].to_numpy(),
+                'disciplinas': aulas['id_disciplina'].to_numpy(dtype=object)
+            }
+        else:
+            # Agrega a presença nas aulas: percentual geral e contagens por disciplina
+            percentual_presenca = (
+                float(aulas['presenca'].eq(1).mean()) * 100.0 if not aulas.empty else 0.0
+            )
+            # Só aulas com presença registrada entram nas contagens (faltas =
+            # count - sum). Faltas primeiro (ordenação estável): as disciplinas
+            # ficam na ordem da primeira ausência, preservando o desempate da
+            # maior concentração. Aulas sem disciplina formam um grupo próprio
+            # (NaN), como na varredura dos eventos
+            registradas = aulas[aulas['presenca'].isin((0, 1))]
+            eventos_por_disciplina = registradas.sort_values(
+                'presenca', kind='stable'
+            ).groupby(
+                'id_disciplina', observed=True, sort=False, dropna=False
+            )['presenca'].agg(['sum', 'count']).to_dict('index')
+            dados_engajamento = {
+                'percentual_presenca': percentual_presenca,
+                'eventos_por_disciplina': eventos_por_disciplina
+            }
         
         return {
             'nome_aluno': nome_aluno,
@@ -203,11 +662,11 @@ class CoordenadorAnalise(Agent):
             'dados_desempenho': {
                 'notas_atuais': notas_atuais,
                 'notas_anteriores': notas_anteriores,
-                'disciplinas': disciplinas
+                'disciplinas_frame': provas[['id_disciplina', 'nota']],
+                # Críticas listadas na ordem de aparição em todo o histórico
+                'ordem_disciplinas': dados_aluno_df['id_disciplina'].dropna().unique()
             },
-            'dados_engajamento': {
-                'eventos': eventos
-            }
+            'dados_engajamento': dados_engajamento
         }
     
     def _montar_json_final(
@@ -218,7 +677,8 @@ class CoordenadorAnalise(Agent):
         resultado_engajamento: AgentResponse,
         resultado_diagnostico: AgentResponse,
         resultado_validacao: AgentResponse,
-        resultado_acao: AgentResponse
+        resultado_acao: AgentResponse,
+        data_analise: str
     ) -> Dict[str, Any]:
         """
         Monta o JSON final com toda a análise.
@@ -231,6 +691,7 @@ class CoordenadorAnalise(Agent):
             resultado_diagnostico: Resultado do diagnóstico
             resultado_validacao: Resultado da validação
             resultado_acao: Resultado da ação recomendada
+            data_analise: Data da análise (ISO 8601, UTC)
             
         Returns:
             Dict: JSON final estruturado
@@ -251,7 +712,7 @@ class CoordenadorAnalise(Agent):
         
         return {
             "idAluno": id_aluno,
-            "dataAnalise": datetime.utcnow().isoformat() + "Z",
+            "dataAnalise": data_analise,
             "scoreRiscoEvasao": score_risco,
             "diagnosticoChave": diagnostico_chave,
             "justificativa": justificativa,
@@ -263,17 +724,15 @@ class CoordenadorAnalise(Agent):
             },
             "metricasAluno": {
                 "mediaGeralSemestreAtual": round(
-                    sum(dados_aluno['dados_desempenho']['notas_atuais']) / 
-                    len(dados_aluno['dados_desempenho']['notas_atuais']), 1
-                ) if dados_aluno['dados_desempenho']['notas_atuais'] else 0.0,
+                    resultado_desempenho.detalhes.media_atual, 1
+                ),
                 "mediaGeralSemestreAnterior": round(
-                    sum(dados_aluno['dados_desempenho']['notas_anteriores']) / 
-                    len(dados_aluno['dados_desempenho']['notas_anteriores']), 1
-                ) if dados_aluno['dados_desempenho']['notas_anteriores'] else 0.0,
-                "frequenciaPresencaAtual": f"{resultado_engajamento.detalhes['percentual_presenca']:.0f}%",
+                    resultado_desempenho.detalhes.media_anterior, 1
+                ),
+                "frequenciaPresencaAtual": f"{resultado_engajamento.detalhes.percentual_presenca:.0f}%",
                 "disciplinaCritica": (
-                    resultado_desempenho.detalhes['disciplinas_criticas'][0]
-                    if resultado_desempenho.detalhes['disciplinas_criticas']
+                    resultado_desempenho.detalhes.disciplinas_criticas[0]
+                    if resultado_desempenho.detalhes.disciplinas_criticas
                     else "Nenhuma"
                 )
             },
@@ -287,8 +746,8 @@ class CoordenadorAnalise(Agent):
     
     def _calcular_score_risco(
         self,
-        detalhes_desempenho: Dict[str, Any],
-        detalhes_engajamento: Dict[str, Any]
+        detalhes_desempenho: DesempenhoDetalhes,
+        detalhes_engajamento: EngajamentoDetalhes
     ) -> int:
         """
         Calcula o score de risco de evasão (0-100).
@@ -300,27 +759,11 @@ class CoordenadorAnalise(Agent):
         Returns:
             int: Score de risco (0-100)
         """
-        score = 0
-        
-        # Fator de queda de rendimento (até 50 pontos)
-        queda = detalhes_desempenho.get('queda_rendimento', 0)
-        if queda > 3:
-            score += 50
-        elif queda > 2:
-            score += 40
-        elif queda > 1:
-            score += 20
-        
-        # Fator de frequência (até 50 pontos)
-        percentual = detalhes_engajamento.get('percentual_presenca', 100)
-        if percentual < 50:
-            score += 50
-        elif percentual < 70:
-            score += 30
-        elif percentual < 85:
-            score += 10
-        
-        return min(score, 100)
+        # Queda de rendimento e frequência contribuem até 50 pontos cada
+        return int(_score_risco(
+            float(detalhes_desempenho.queda_rendimento),
+            float(detalhes_engajamento.percentual_presenca)
+        ))
     
     def _determinar_diagnostico_chave(self, detalhes_validacao: Dict[str, Any]) -> str:
         """
@@ -332,10 +775,8 @@ class CoordenadorAnalise(Agent):
         Returns:
             str: Diagnóstico chave em formato de constante
         """
-        if "específica" in detalhes_validacao.get('nuances', []):
-            return "DIFICULDADE_PONTUAL_EM_DISCIPLINA_CRITICA"
-        elif "geral" in str(detalhes_validacao).lower():
-            return "DESENGAJAMENTO_GERAL"
-        else:
-            return "DESEMPENHO_INSTAVEL"
+        return _DIAGNOSTICOS_CHAVE.get(
+            detalhes_validacao.get('tipo_diagnostico'),
+            "DESEMPENHO_INSTAVEL"
+        )
 
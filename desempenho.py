@@ -5,8 +5,8 @@ Este agente é responsável por analisar exclusivamente as notas do aluno,
 identificando tendências de queda, inconsistências e desempenho abaixo da média.
 """
 
-from typing import Dict, Any, List
-from .base import Agent, AgentResponse
+from typing import Dict, Any, List, Optional, Sequence
+from .base import Agent, AgentResponse, DesempenhoDetalhes
 import pandas as pd
 
 
@@ -21,6 +21,8 @@ class AnalisadorDesempenho(Agent):
     - Desempenho abaixo da média
     """
     
+    PREFIXO_ERRO = "Erro ao analisar desempenho"
+    
     def __init__(self):
         super().__init__("Analisador de Desempenho")
     
@@ -30,9 +32,11 @@ class AnalisadorDesempenho(Agent):
         
         Args:
             dados: Dicionário contendo:
-                - 'notas_atuais': Lista de notas do semestre atual
-                - 'notas_anteriores': Lista de notas do semestre anterior
-                - 'disciplinas': Lista de disciplinas com suas notas
+                - 'notas_atuais': Notas do semestre atual (lista ou np.ndarray)
+                - 'notas_anteriores': Notas do semestre anterior (lista ou np.ndarray)
+                - 'disciplinas_frame': DataFrame com as colunas 'id_disciplina' e 'nota'
+                - 'ordem_disciplinas': Disciplinas na ordem de aparição no histórico
+                  completo do aluno (opcional; sem ela, vale a ordem das provas)
                 
         Returns:
             AgentResponse: Análise estruturada do desempenho
@@ -41,7 +45,8 @@ class AnalisadorDesempenho(Agent):
             # Extrai os dados necessários
             notas_atuais = dados.get('notas_atuais', [])
             notas_anteriores = dados.get('notas_anteriores', [])
-            disciplinas = dados.get('disciplinas', {})
+            disciplinas_frame = dados.get('disciplinas_frame')
+            ordem_disciplinas = dados.get('ordem_disciplinas')
             
             # Calcula a média geral do semestre atual
             media_atual = self._calcular_media(notas_atuais)
@@ -50,7 +55,10 @@ class AnalisadorDesempenho(Agent):
             media_anterior = self._calcular_media(notas_anteriores)
             
             # Identifica disciplinas críticas (notas baixas)
-            disciplinas_criticas = self._identificar_disciplinas_criticas(disciplinas)
+            disciplinas_criticas = self._identificar_disciplinas_criticas(
+                disciplinas_frame,
+                ordem_disciplinas
+            )
             
             # Calcula a queda de rendimento
             queda_rendimento = media_anterior - media_atual
@@ -67,52 +75,59 @@ class AnalisadorDesempenho(Agent):
                 agent_name=self.nome,
                 status="sucesso",
                 resultado=resultado,
-                detalhes={
-                    "media_atual": media_atual,
-                    "media_anterior": media_anterior,
-                    "queda_rendimento": queda_rendimento,
-                    "disciplinas_criticas": disciplinas_criticas
-                }
+                detalhes=DesempenhoDetalhes(
+                    media_atual=media_atual,
+                    media_anterior=media_anterior,
+                    queda_rendimento=queda_rendimento,
+                    disciplinas_criticas=disciplinas_criticas
+                )
             )
         
         except Exception as e:
-            return AgentResponse(
-                agent_name=self.nome,
-                status="erro",
-                resultado=f"Erro ao analisar desempenho: {str(e)}",
-                detalhes={"erro": str(e)}
-            )
+            return self._responder_erro(e)
     
     def _calcular_media(self, notas: List[float]) -> float:
         """
         Calcula a média aritmética de uma lista de notas.
         
         Args:
-            notas: Lista de notas
+            notas: Lista ou vetor numpy de notas
             
         Returns:
             float: Média das notas (0.0 se lista vazia)
         """
-        if not notas:
+        if len(notas) == 0:
             return 0.0
-        return sum(notas) / len(notas)
+        return float(sum(notas) / len(notas))
     
-    def _identificar_disciplinas_criticas(self, disciplinas: Dict[str, List[float]]) -> List[str]:
+    def _identificar_disciplinas_criticas(
+        self,
+        disciplinas_frame: pd.DataFrame,
+        ordem_disciplinas: Optional[Sequence[str]] = None
+    ) -> List[str]:
         """
         Identifica disciplinas com desempenho crítico (média < 6.0).
         
         Args:
-            disciplinas: Dicionário com nome da disciplina e suas notas
+            disciplinas_frame: DataFrame com as colunas 'id_disciplina' e 'nota'
+            ordem_disciplinas: Ordem em que as críticas são listadas (padrão:
+                ordem de aparição em 'disciplinas_frame')
             
         Returns:
             List[str]: Lista de disciplinas críticas
         """
-        criticas = []
-        for disciplina, notas in disciplinas.items():
-            media_disciplina = self._calcular_media(notas)
-            if media_disciplina < 6.0:
-                criticas.append(disciplina)
-        return criticas
+        if disciplinas_frame is None or disciplinas_frame.empty:
+            return []
+        
+        # Uma única agregação no pandas, na ordem em que as disciplinas aparecem
+        medias = disciplinas_frame.groupby(
+            'id_disciplina', observed=True, sort=False
+        )['nota'].mean()
+        
+        # Disciplinas sem prova ficam com média NaN e não são críticas
+        if ordem_disciplinas is not None:
+            medias = medias.reindex(ordem_disciplinas)
+        return medias.index[medias < 6.0].tolist()
     
     def _montar_resultado(
         self,
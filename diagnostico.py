@@ -5,8 +5,154 @@ Este agente recebe os relatórios dos dois analistas (Desempenho e Engajamento)
 e formula uma hipótese inicial sobre a situação do aluno.
 """
 
-from typing import Dict, Any
-from .base import Agent, AgentResponse
+import math
+from enum import IntEnum
+from functools import lru_cache
+from typing import Dict, Any, Callable, List, Optional, Tuple
+from .base import Agent, AgentResponse, DesempenhoDetalhes, EngajamentoDetalhes
+from . import hipoteses
+import numpy as np
+
+
+class HipoteseTag(IntEnum):
+    """Identificador canônico de cada hipótese formulada pelo diagnóstico."""
+    DESENGAJAMENTO_GERAL = hipoteses.DESENGAJAMENTO_GERAL
+    DIFICULDADE_ESPECIFICA = hipoteses.DIFICULDADE_ESPECIFICA
+    QUEDA_MODERADA = hipoteses.QUEDA_MODERADA
+    ESTAVEL = hipoteses.ESTAVEL
+
+
+# Limiares padrão: (queda para desengajamento geral, presença para
+# desengajamento geral, queda moderada)
+LIMIARES_PADRAO = (2.0, 70.0, 1.5)
+
+# Cascata das hipóteses, compartilhada pelos classificadores gerados: a
+# primeira regra com todas as condições verdadeiras decide a tag e, sem
+# nenhuma, a hipótese é ESTAVEL. Os limiares entram como constantes literais
+_REGRAS_HIPOTESE = (
+    ("DESENGAJAMENTO_GERAL", (
+        "queda_rendimento > {queda_geral!r}",
+        "percentual_presenca < {presenca_geral!r}"
+    )),
+    ("DIFICULDADE_ESPECIFICA", ("quantidade_criticas == 1",)),
+    ("QUEDA_MODERADA", ("queda_rendimento > {queda_moderada!r}",))
+)
+
+_ARGUMENTOS_CLASSIFICADOR = "queda_rendimento, percentual_presenca, quantidade_criticas"
+
+
+def _gerar_fonte_classificadores() -> str:
+    """
+    Gera a fonte dos classificadores a partir de '_REGRAS_HIPOTESE'.
+    
+    'classificar' avalia um aluno com uma cadeia de ifs; 'classificar_coorte'
+    avalia vetores de uma coorte inteira com 'np.select', na mesma ordem.
+    
+    Returns:
+        str: Fonte com os limiares ainda como campos de formatação
+    """
+    linhas = [f"def classificar({_ARGUMENTOS_CLASSIFICADOR}):"]
+    condicoes_coorte = []
+    for tag, condicoes in _REGRAS_HIPOTESE:
+        linhas.append(f"    if {' and '.join(condicoes)}:")
+        linhas.append(f"        return {tag}")
+        condicoes_coorte.append(" & ".join(f"({condicao})" for condicao in condicoes))
+    linhas.append("    return ESTAVEL")
+    
+    tags = ", ".join(tag for tag, _ in _REGRAS_HIPOTESE)
+    linhas.append("")
+    linhas.append(f"def classificar_coorte({_ARGUMENTOS_CLASSIFICADOR}):")
+    linhas.append(
+        f"    return np.select([{', '.join(condicoes_coorte)}], [{tags}], ESTAVEL).astype(np.int8)"
+    )
+    return "\n".join(linhas) + "\n"
+
+
+# Fonte dos classificadores; os limiares entram como constantes literais
+_FONTE_CLASSIFICADOR = _gerar_fonte_classificadores()
+
+
+@lru_cache(maxsize=None)
+def _compilar_classificadores(
+    queda_geral: float,
+    presenca_geral: float,
+    queda_moderada: float
+) -> Dict[str, Callable]:
+    """
+    Gera e compila os classificadores de um perfil de limiares (em cache).
+    
+    Returns:
+        Dict: namespace com 'classificar' e 'classificar_coorte'
+        
+    Raises:
+        ValueError: Se algum limiar não for um número finito
+    """
+    # float() e isfinite() garantem que apenas literais numéricos entram no
+    # código gerado: repr() de inf e nan não é um literal válido
+    limiares = {
+        'queda_geral': float(queda_geral),
+        'presenca_geral': float(presenca_geral),
+        'queda_moderada': float(queda_moderada)
+    }
+    for nome, limiar in limiares.items():
+        if not math.isfinite(limiar):
+            raise ValueError(f"Limiar '{nome}' deve ser um número finito, recebido {limiar!r}")
+    fonte = _FONTE_CLASSIFICADOR.format(**limiares)
+    namespace = {tag.name: tag for tag in HipoteseTag}
+    namespace['np'] = np
+    exec(compile(fonte, "<classificador_hipotese>", "exec"), namespace)
+    return namespace
+
+
+def criar_classificador_hipotese(
+    queda_geral: float,
+    presenca_geral: float,
+    queda_moderada: float
+) -> Callable[[float, float, int], HipoteseTag]:
+    """
+    Gera um classificador de hipóteses especializado para um perfil de limiares.
+    
+    O código é gerado e compilado uma única vez por perfil (resultado em cache),
+    com os limiares embutidos como constantes em vez de lidos a cada chamada.
+    
+    Args:
+        queda_geral: Queda acima da qual, com presença baixa, o desengajamento é geral
+        presenca_geral: Presença abaixo da qual, com queda alta, o desengajamento é geral
+        queda_moderada: Queda acima da qual a queda é considerada moderada
+        
+    Returns:
+        Callable: classificar(queda_rendimento, percentual_presenca, quantidade_criticas)
+        
+    Raises:
+        ValueError: Se algum limiar não for um número finito
+    """
+    return _compilar_classificadores(queda_geral, presenca_geral, queda_moderada)['classificar']
+
+
+def criar_classificador_coorte(
+    queda_geral: float,
+    presenca_geral: float,
+    queda_moderada: float
+) -> Callable[[np.ndarray, np.ndarray, np.ndarray], np.ndarray]:
+    """
+    Gera a versão vetorizada de 'criar_classificador_hipotese'.
+    
+    Ambas vêm das mesmas regras e do mesmo código gerado, então classificam
+    cada aluno de forma idêntica.
+    
+    Args:
+        queda_geral: Queda acima da qual, com presença baixa, o desengajamento é geral
+        presenca_geral: Presença abaixo da qual, com queda alta, o desengajamento é geral
+        queda_moderada: Queda acima da qual a queda é considerada moderada
+        
+    Returns:
+        Callable: classificar_coorte(quedas, presencas, quantidades_criticas),
+        devolvendo o valor de 'HipoteseTag' de cada aluno (int8)
+        
+    Raises:
+        ValueError: Se algum limiar não for um número finito
+    """
+    return _compilar_classificadores(queda_geral, presenca_geral, queda_moderada)['classificar_coorte']
 
 
 class AgenteDiagnostico(Agent):
@@ -20,8 +166,19 @@ class AgenteDiagnostico(Agent):
     - Prepara o diagnóstico para validação
     """
     
-    def agents(self):
-        super().agents("Agente de Diagnóstico")
+    PREFIXO_ERRO = "Erro ao formular diagnóstico"
+    
+    def __init__(self, limiares: Tuple[float, float, float] = LIMIARES_PADRAO):
+        """
+        Inicializa o agente.
+        
+        Args:
+            limiares: (queda geral, presença geral, queda moderada)
+        """
+        super().__init__("Agente de Diagnóstico")
+        self._limiares = tuple(float(limiar) for limiar in limiares)
+        self._classificar = criar_classificador_hipotese(*self._limiares)
+        self._classificar_coorte = criar_classificador_coorte(*self._limiares)
     
     def analisar(self, dados: Dict[str, Any]) -> AgentResponse:
         """
@@ -31,75 +188,174 @@ class AgenteDiagnostico(Agent):
             dados: Dicionário contendo:
                 - 'relatorio_desempenho': Resposta do AnalisadorDesempenho
                 - 'relatorio_engajamento': Resposta do AnalisadorEngajamento
-                - 'detalhes_desempenho': Detalhes da análise de desempenho
-                - 'detalhes_engajamento': Detalhes da análise de engajamento
+                - 'detalhes_desempenho': DesempenhoDetalhes do AnalisadorDesempenho
+                - 'detalhes_engajamento': EngajamentoDetalhes do AnalisadorEngajamento
                 
         Returns:
             AgentResponse: Hipótese diagnóstica
         """
-        try:
-            # Extrai os relatórios dos analistas
-            detalhes_desempenho = dados.get('detalhes_desempenho', {})
-            detalhes_engajamento = dados.get('detalhes_engajamento', {})
+        # Valida as entradas antes de formular a hipótese
+        erro = self._validar_entrada(dados)
+        if erro is not None:
+            return erro
+        
+        # Extrai os relatórios dos analistas
+        detalhes_desempenho = dados.get('detalhes_desempenho') or DesempenhoDetalhes()
+        detalhes_engajamento = dados.get('detalhes_engajamento') or EngajamentoDetalhes()
+        
+        # Analisa os padrões
+        tag, hipotese = self._formular_hipotese(detalhes_desempenho, detalhes_engajamento)
+        
+        return AgentResponse(
+            agent_name=self.nome,
+            status="sucesso",
+            resultado=hipotese,
+            detalhes={
+                "tag_hipotese": tag,
+                "desempenho": detalhes_desempenho,
+                "engajamento": detalhes_engajamento
+            }
+        )
+    
+    def _validar_entrada(self, dados: Dict[str, Any]) -> Optional[AgentResponse]:
+        """
+        Verifica as entradas de 'analisar'.
+        
+        Args:
+            dados: Dicionário de entrada do agente
             
-            # Analisa os padrões
-            hipotese = self._formular_hipotese(detalhes_desempenho, detalhes_engajamento)
+        Returns:
+            Optional[AgentResponse]: Resposta de erro, ou None se as entradas são válidas
+        """
+        return (
+            self._exigir_tipo(dados, 'detalhes_desempenho', DesempenhoDetalhes, "um DesempenhoDetalhes")
+            or self._exigir_tipo(dados, 'detalhes_engajamento', EngajamentoDetalhes, "um EngajamentoDetalhes")
+        )
+    
+    def analisar_lote(self, lista_dados: List[Dict[str, Any]]) -> List[AgentResponse]:
+        """
+        Formula as hipóteses de uma coorte com uma única classificação vetorizada.
+        
+        Args:
+            lista_dados: Um dicionário por aluno, no formato aceito por 'analisar'
             
-            return AgentResponse(
+        Returns:
+            List[AgentResponse]: Uma resposta por aluno, na mesma ordem
+        """
+        respostas: List[AgentResponse] = [None] * len(lista_dados)
+        validos = []
+        for posicao, dados in enumerate(lista_dados):
+            try:
+                erro = self._validar_entrada(dados)
+            except Exception as e:
+                erro = self._responder_erro(e)
+            if erro is not None:
+                respostas[posicao] = erro
+            else:
+                validos.append(posicao)
+        
+        # Uma entrada inesperada não derruba a coorte: refaz aluno a aluno e
+        # só quem falhar recebe a resposta de erro
+        try:
+            self._classificar_lote(lista_dados, validos, respostas)
+        except Exception:
+            for posicao in validos:
+                respostas[posicao] = self._analisar_isolado(lista_dados[posicao])
+        
+        return respostas
+    
+    def _classificar_lote(
+        self,
+        lista_dados: List[Dict[str, Any]],
+        validos: List[int],
+        respostas: List[AgentResponse]
+    ) -> None:
+        """
+        Classifica de uma vez as hipóteses dos alunos em 'validos'.
+        
+        Args:
+            lista_dados: Entradas de 'analisar_lote'
+            validos: Posições, em 'lista_dados', das entradas já validadas
+            respostas: Lista de respostas, preenchida nas posições de 'validos'
+        """
+        # Extrai os detalhes de todos os alunos uma única vez
+        lista_desempenho = [
+            lista_dados[posicao].get('detalhes_desempenho') or DesempenhoDetalhes()
+            for posicao in validos
+        ]
+        lista_engajamento = [
+            lista_dados[posicao].get('detalhes_engajamento') or EngajamentoDetalhes()
+            for posicao in validos
+        ]
+        
+        tags = self._classificar_coorte(
+            np.array([d.queda_rendimento for d in lista_desempenho], dtype=np.float64),
+            np.array([d.percentual_presenca for d in lista_engajamento], dtype=np.float64),
+            np.array([len(d.disciplinas_criticas) for d in lista_desempenho], dtype=np.int64)
+        )
+        
+        for posicao, tag, detalhes_desempenho, detalhes_engajamento in zip(
+            validos, tags, lista_desempenho, lista_engajamento
+        ):
+            tag = HipoteseTag(int(tag))
+            respostas[posicao] = AgentResponse(
                 agent_name=self.nome,
                 status="sucesso",
-                resultado=hipotese,
+                resultado=self._texto_hipotese(tag, detalhes_desempenho, detalhes_engajamento),
                 detalhes={
+                    "tag_hipotese": tag,
                     "desempenho": detalhes_desempenho,
                     "engajamento": detalhes_engajamento
                 }
             )
-        
-        except Exception as e:
-            return AgentResponse(
-                agent_name=self.nome,
-                status="erro",
-                resultado=f"Erro ao formular diagnóstico: {str(e)}",
-                detalhes={"erro": str(e)}
-            )
     
     def _formular_hipotese(
         self,
-        detalhes_desempenho: Dict[str, Any],
-        detalhes_engajamento: Dict[str, Any]
-    ) -> str:
+        desempenho: DesempenhoDetalhes,
+        engajamento: EngajamentoDetalhes
+    ) -> Tuple[HipoteseTag, str]:
         """
         Formula a hipótese diagnóstica baseada nos dados.
         
         Args:
-            detalhes_desempenho: Detalhes da análise de desempenho
-            detalhes_engajamento: Detalhes da análise de engajamento
+            desempenho: Detalhes da análise de desempenho
+            engajamento: Detalhes da análise de engajamento
             
         Returns:
-            str: Hipótese diagnóstica
+            Tuple: (tag da hipótese, texto da hipótese diagnóstica)
         """
-        queda_rendimento = detalhes_desempenho.get('queda_rendimento', 0)
-        percentual_presenca = detalhes_engajamento.get('percentual_presenca', 100)
-        disciplinas_criticas = detalhes_desempenho.get('disciplinas_criticas', [])
-        ausencias_disciplina = detalhes_engajamento.get('padroes_ausencia', {}).get('ausencias_por_disciplina', {})
-        
-        # Lógica para formular a hipótese
-        if queda_rendimento > 2.0 and percentual_presenca < 70:
-            # Queda significativa e baixa frequência geral
-            hipotese = "Queda de rendimento geral por desengajamento."
-        elif disciplinas_criticas and len(disciplinas_criticas) == 1:
-            # Problema concentrado em uma disciplina
-            disciplina_problema = disciplinas_criticas[0]
-            if disciplina_problema in ausencias_disciplina:
-                hipotese = f"Dificuldade específica em {disciplina_problema} com ausências concentradas."
-            else:
-                hipotese = f"Dificuldade específica em {disciplina_problema}."
-        elif queda_rendimento > 1.5:
-            # Queda moderada
-            hipotese = "Queda de rendimento com padrão de ausências seletivas."
-        else:
-            # Desempenho estável ou leve queda
-            hipotese = "Desempenho relativamente estável com possível desengajamento em disciplinas específicas."
+        # Lógica para formular a hipótese (classificador especializado)
+        tag = self._classificar(
+            desempenho.queda_rendimento,
+            engajamento.percentual_presenca,
+            len(desempenho.disciplinas_criticas)
+        )
         
-        return hipotese
-
+        return tag, self._texto_hipotese(tag, desempenho, engajamento)
+    
+    def _texto_hipotese(
+        self,
+        tag: HipoteseTag,
+        desempenho: DesempenhoDetalhes,
+        engajamento: EngajamentoDetalhes
+    ) -> str:
+        """
+        Redige o texto da hipótese já classificada.
+        
+        Args:
+            tag: Hipótese escolhida pelo classificador
+            desempenho: Detalhes da análise de desempenho
+            engajamento: Detalhes da análise de engajamento
+            
+        Returns:
+            str: Texto da hipótese diagnóstica
+        """
+        # A primeira disciplina crítica só é usada na dificuldade específica
+        disciplina_critica = (
+            desempenho.disciplinas_criticas[0] if desempenho.disciplinas_criticas else ""
+        )
+        return hipoteses.texto_hipotese(
+            tag,
+            disciplina_critica,
+            disciplina_critica in engajamento.ausencias_por_disciplina
+        )
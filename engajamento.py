@@ -5,8 +5,90 @@ Este agente é responsável por analisar exclusivamente a presença e frequênci
 do aluno, identificando padrões de ausência e desengajamento.
 """
 
-from typing import Dict, Any, List
-from .base import Agent, AgentResponse
+from numbers import Real
+from typing import Dict, Any, List, Optional, Tuple
+from .base import Agent, AgentResponse, EngajamentoDetalhes
+from .aceleracao import njit, prange, NUMBA_DISPONIVEL
+import numpy as np
+import pandas as pd
+
+
+# Código de um evento sem registro de presença: conta como aula, mas nem
+# como presença (1) nem como falta (0)
+PRESENCA_DESCONHECIDA = -1
+
+
+def _indexar_pares(codigos, inicios, n_disciplinas):
+    """
+    Numera os pares (aluno, disciplina) que de fato ocorrem na coorte.
+    
+    Os pares ficam ordenados por aluno, então os do aluno 'a' ocupam as
+    posições [ponteiros[a], ponteiros[a + 1]) (formato CSR). A memória cresce
+    com o número de eventos, e não com alunos x disciplinas da coorte.
+    
+    Returns:
+        Tupla (par de cada evento, código de disciplina de cada par, ponteiros)
+    """
+    n_alunos = inicios.shape[0] - 1
+    alunos = np.repeat(np.arange(n_alunos, dtype=np.int64), np.diff(inicios))
+    chaves, pares = np.unique(alunos * n_disciplinas + codigos, return_inverse=True)
+    ponteiros = np.searchsorted(
+        chaves, np.arange(n_alunos + 1, dtype=np.int64) * n_disciplinas
+    )
+    disciplina_par = chaves % n_disciplinas if n_disciplinas else chaves
+    return pares.astype(np.int64, copy=False), disciplina_par, ponteiros
+
+
+@njit(cache=True, parallel=True)
+def _varrer_presencas_jit(presencas, pares, inicios, n_pares):
+    """
+    Percorre os eventos de uma coorte contando presenças e faltas por aluno.
+    
+    Os eventos de todos os alunos ficam concatenados; os do aluno 'a' ocupam
+    as posições [inicios[a], inicios[a + 1]). Cada evento aponta para o seu
+    par (aluno, disciplina) em 'pares' (ver '_indexar_pares'), e cada aluno
+    só escreve nos próprios pares: os alunos são processados em paralelo
+    (prange) e uma única vez.
+    
+    Returns:
+        Tupla (presenças por aluno, faltas por par, posição da primeira falta
+        por par)
+    """
+    n_alunos = inicios.shape[0] - 1
+    totais = np.zeros(n_alunos, dtype=np.int64)
+    contagens = np.zeros(n_pares, dtype=np.int64)
+    primeira_falta = np.full(n_pares, presencas.shape[0], dtype=np.int64)
+    for aluno in prange(n_alunos):
+        for i in range(inicios[aluno], inicios[aluno + 1]):
+            if presencas[i] == 1:
+                totais[aluno] += 1
+            elif presencas[i] == 0:
+                par = pares[i]
+                if contagens[par] == 0:
+                    primeira_falta[par] = i
+                contagens[par] += 1
+    return totais, contagens, primeira_falta
+
+
+def _varrer_presencas_numpy(presencas, pares, inicios, n_pares):
+    """Versão vetorizada de '_varrer_presencas_jit', usada sem o Numba."""
+    n_alunos = inicios.shape[0] - 1
+    alunos = np.repeat(np.arange(n_alunos, dtype=np.int64), np.diff(inicios))
+    totais = np.bincount(alunos[presencas == 1], minlength=n_alunos)
+    
+    # Faltas em ordem crescente: a primeira ocorrência de cada par é a primeira falta
+    faltas = np.flatnonzero(presencas == 0)
+    contagens = np.bincount(pares[faltas], minlength=n_pares)
+    primeira_falta = np.full(n_pares, presencas.shape[0], dtype=np.int64)
+    com_falta, primeiras = np.unique(pares[faltas], return_index=True)
+    primeira_falta[com_falta] = faltas[primeiras]
+    return totais, contagens, primeira_falta
+
+
+# Kernel das coortes grandes: só estas chamadas pagam a importação do Numba
+_varrer_presencas = (
+    _varrer_presencas_jit if NUMBA_DISPONIVEL else _varrer_presencas_numpy
+)
 
 
 class AnalisadorEngajamento(Agent):
@@ -20,6 +102,12 @@ class AnalisadorEngajamento(Agent):
     - Tendências de desengajamento
     """
     
+    PREFIXO_ERRO = "Erro ao analisar engajamento"
+    
+    # Eventos a partir dos quais a varredura da coorte compensa carregar o
+    # Numba (abaixo disso, a versão NumPy termina antes da importação)
+    MIN_EVENTOS_JIT = 1_000_000
+    
     def __init__(self):
         super().__init__("Analisador de Engajamento")
     
@@ -30,107 +118,433 @@ class AnalisadorEngajamento(Agent):
         Args:
             dados: Dicionário contendo:
                 - 'eventos': Lista de eventos de presença/ausência
-                - 'disciplinas': Lista de disciplinas
+                - 'presencas': Vetor int8 de presenças (1), faltas (0) e
+                  PRESENCA_DESCONHECIDA (opcional; dispensa a
+                  conversão dos eventos)
+                - 'disciplinas': Vetor com a disciplina de cada evento, alinhado
+                  a 'presencas' (opcional)
+                - 'percentual_presenca': Percentual já agregado (opcional)
+                - 'eventos_por_disciplina': Contagens por disciplina no formato
+                  {disciplina: {'sum': presenças, 'count': aulas com
+                  presença registrada}} (opcional)
+                
+                Quando os agregados são informados, os eventos não são percorridos.
                 
         Returns:
             AgentResponse: Análise estruturada do engajamento
         """
+        # Valida as entradas antes de percorrer os eventos
+        erro = self._validar_entrada(dados)
+        if erro is not None:
+            return erro
+        
+        # Extrai os dados necessários
+        eventos = dados.get('eventos', [])
+        percentual_presenca = dados.get('percentual_presenca')
+        eventos_por_disciplina = dados.get('eventos_por_disciplina')
+        
+        # Sem os agregados, converte os eventos em vetores (SoA) uma única vez
+        if percentual_presenca is None or eventos_por_disciplina is None:
+            presencas = dados.get('presencas')
+            if presencas is None:
+                presencas = self._vetor_presencas(eventos)
+            disciplinas = dados.get('disciplinas')
+            if disciplinas is None:
+                disciplinas = self._vetor_disciplinas(eventos)
+            
+            # Percentual e faltas por disciplina em uma única passada
+            percentual_eventos, nomes, contagens = self._varrer_eventos(
+                presencas, disciplinas
+            )
+        
+        # Usa os agregados quando informados
+        if percentual_presenca is None:
+            percentual_presenca = percentual_eventos
+        
+        if eventos_por_disciplina is not None:
+            nomes, contagens = self._ausencias_agregadas(eventos_por_disciplina)
+        
+        return self._responder(percentual_presenca, nomes, contagens)
+    
+    def _validar_entrada(self, dados: Dict[str, Any]) -> Optional[AgentResponse]:
+        """
+        Verifica as entradas de 'analisar'.
+        
+        Args:
+            dados: Dicionário de entrada do agente
+            
+        Returns:
+            Optional[AgentResponse]: Resposta de erro, ou None se as entradas são válidas
+        """
+        erro = (
+            self._exigir_lista(dados, 'eventos')
+            or self._exigir_tipo(dados, 'presencas', (list, tuple, np.ndarray, type(None)), "um vetor")
+            or self._exigir_tipo(dados, 'disciplinas', (list, tuple, np.ndarray, type(None)), "um vetor")
+            or self._exigir_tipo(dados, 'percentual_presenca', (Real, type(None)), "um número")
+            or self._exigir_tipo(dados, 'eventos_por_disciplina', (dict, type(None)), "um dicionário")
+        )
+        if erro is not None:
+            return erro
+        
+        # Os vetores são lidos pela mesma posição: o que faltar vem dos eventos
+        quantidade_eventos = len(dados.get('eventos', []))
+        presencas = dados.get('presencas')
+        disciplinas = dados.get('disciplinas')
+        tamanho_presencas = quantidade_eventos if presencas is None else len(presencas)
+        tamanho_disciplinas = quantidade_eventos if disciplinas is None else len(disciplinas)
+        if tamanho_presencas != tamanho_disciplinas:
+            return self._responder_erro(
+                f"'presencas' ({tamanho_presencas}) e 'disciplinas' ({tamanho_disciplinas}) "
+                "devem ter o mesmo tamanho"
+            )
+        return None
+    
+    def analisar_lote(self, lista_dados: List[Dict[str, Any]]) -> List[AgentResponse]:
+        """
+        Analisa o engajamento de uma coorte com uma única varredura paralela.
+        
+        Os eventos de todos os alunos são concatenados (vetores SoA com
+        deslocamentos por aluno) e percorridos de uma vez. Entradas que já
+        trazem os agregados são delegadas a 'analisar'.
+        
+        Args:
+            lista_dados: Um dicionário por aluno, no formato aceito por 'analisar'
+            
+        Returns:
+            List[AgentResponse]: Uma resposta por aluno, na mesma ordem
+        """
+        respostas: List[AgentResponse] = [None] * len(lista_dados)
+        lote = []
+        
+        for posicao, dados in enumerate(lista_dados):
+            try:
+                erro = self._validar_entrada(dados)
+            except Exception as e:
+                erro = self._responder_erro(e)
+            if erro is not None:
+                respostas[posicao] = erro
+            elif dados.get('percentual_presenca') is not None or dados.get('eventos_por_disciplina') is not None:
+                respostas[posicao] = self._analisar_isolado(dados)
+            else:
+                lote.append(posicao)
+        
+        if not lote:
+            return respostas
+        
+        # Uma entrada inesperada não derruba a coorte: refaz aluno a aluno e
+        # só quem falhar recebe a resposta de erro
         try:
-            # Extrai os dados necessários
+            self._analisar_coorte(lista_dados, lote, respostas)
+        except Exception:
+            for posicao in lote:
+                respostas[posicao] = self._analisar_isolado(lista_dados[posicao])
+        
+        return respostas
+    
+    def _analisar_coorte(
+        self,
+        lista_dados: List[Dict[str, Any]],
+        lote: List[int],
+        respostas: List[AgentResponse]
+    ) -> None:
+        """
+        Varre de uma vez os eventos dos alunos em 'lote'.
+        
+        Args:
+            lista_dados: Entradas de 'analisar_lote'
+            lote: Posições, em 'lista_dados', dos alunos a varrer
+            respostas: Lista de respostas, preenchida nas posições de 'lote'
+        """
+        # Monta os vetores da coorte uma única vez
+        vetores_presencas = []
+        vetores_disciplinas = []
+        for posicao in lote:
+            dados = lista_dados[posicao]
             eventos = dados.get('eventos', [])
+            presencas = dados.get('presencas')
+            disciplinas = dados.get('disciplinas')
+            vetores_presencas.append(
+                self._vetor_presencas(eventos) if presencas is None
+                else np.asarray(presencas, dtype=np.int8)
+            )
+            vetores_disciplinas.append(
+                self._vetor_disciplinas(eventos) if disciplinas is None
+                else np.asarray(disciplinas, dtype=object)
+            )
+        
+        tamanhos = [vetor.shape[0] for vetor in vetores_presencas]
+        for vetor_presencas, vetor_disciplinas in zip(vetores_presencas, vetores_disciplinas):
+            self._checar_alinhamento(vetor_presencas, vetor_disciplinas)
+        inicios = np.zeros(len(lote) + 1, dtype=np.int64)
+        np.cumsum(tamanhos, out=inicios[1:])
+        
+        codigos, nomes = self._codificar_disciplinas(np.concatenate(vetores_disciplinas))
+        pares, disciplina_par, ponteiros = _indexar_pares(codigos, inicios, len(nomes))
+        varrer = (
+            _varrer_presencas if codigos.shape[0] >= self.MIN_EVENTOS_JIT
+            else _varrer_presencas_numpy
+        )
+        totais, contagens, primeira_falta = varrer(
+            np.concatenate(vetores_presencas).astype(np.int8, copy=False),
+            pares,
+            inicios,
+            disciplina_par.shape[0]
+        )
+        
+        for indice, posicao in enumerate(lote):
+            tamanho = tamanhos[indice]
+            percentual = (totais[indice] / tamanho) * 100 if tamanho > 0 else 0.0
+            pares_aluno = slice(ponteiros[indice], ponteiros[indice + 1])
+            nomes_aluno, contagens_aluno = self._ordenar_faltas(
+                nomes[disciplina_par[pares_aluno]],
+                contagens[pares_aluno],
+                primeira_falta[pares_aluno]
+            )
+            respostas[posicao] = self._responder(
+                float(percentual), nomes_aluno, contagens_aluno
+            )
+    
+    def _responder(
+        self,
+        percentual_presenca: float,
+        nomes: np.ndarray,
+        contagens: np.ndarray
+    ) -> AgentResponse:
+        """
+        Monta a resposta de sucesso a partir do percentual e das faltas.
+        
+        Args:
+            percentual_presenca: Percentual de presença
+            nomes: Disciplinas com falta
+            contagens: Número de faltas de cada disciplina
             
-            # Calcula o percentual de presença
-            percentual_presenca = self._calcular_percentual_presenca(eventos)
+        Returns:
+            AgentResponse: Análise estruturada do engajamento
+        """
+        # Monta o resultado
+        resultado = self._montar_resultado(percentual_presenca, nomes, contagens)
+        
+        return AgentResponse(
+            agent_name=self.nome,
+            status="sucesso",
+            resultado=resultado,
+            detalhes=self._montar_detalhes(percentual_presenca, nomes, contagens)
+        )
+    
+    def _vetor_presencas(self, eventos: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Converte os eventos em um vetor int8 de presenças (1) e faltas (0).
+        
+        Args:
+            eventos: Lista de eventos com informação de presença (0 ou 1)
             
-            # Identifica padrões de ausência
-            padroes_ausencia = self._identificar_padroes_ausencia(eventos)
+        Returns:
+            np.ndarray: Vetor int8; eventos sem a chave 'presenca' contam como
+            falta e valores nulos ou fora de 0/1 como PRESENCA_DESCONHECIDA
+        """
+        return np.fromiter(
+            (self._codigo_presenca(evento.get('presenca', 0)) for evento in eventos),
+            dtype=np.int8,
+            count=len(eventos)
+        )
+    
+    def _codigo_presenca(self, valor: Any) -> int:
+        """Código int8 de um valor de presença (1, 0 ou PRESENCA_DESCONHECIDA)."""
+        if valor is None or valor is pd.NA:
+            return PRESENCA_DESCONHECIDA
+        if valor == 1:
+            return 1
+        if valor == 0:
+            return 0
+        return PRESENCA_DESCONHECIDA
+    
+    def _vetor_disciplinas(self, eventos: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Extrai a disciplina de cada evento, alinhada ao vetor de presenças.
+        
+        Args:
+            eventos: Lista de eventos
             
-            # Monta o resultado
-            resultado = self._montar_resultado(percentual_presenca, padroes_ausencia)
+        Returns:
+            np.ndarray: Vetor (object) com o nome da disciplina de cada evento
+        """
+        disciplinas = np.empty(len(eventos), dtype=object)
+        disciplinas[:] = [evento.get('disciplina', 'Desconhecida') for evento in eventos]
+        return disciplinas
+    
+    def _varrer_eventos(
+        self,
+        presencas: np.ndarray,
+        disciplinas: np.ndarray
+    ) -> Tuple[float, np.ndarray, np.ndarray]:
+        """
+        Calcula o percentual de presença e as faltas por disciplina juntos.
+        
+        Args:
+            presencas: Vetor int8 de presenças (1), faltas (0) e PRESENCA_DESCONHECIDA
+            disciplinas: Disciplina de cada evento, alinhada a 'presencas'
             
-            return AgentResponse(
-                agent_name=self.nome,
-                status="sucesso",
-                resultado=resultado,
-                detalhes={
-                    "percentual_presenca": percentual_presenca,
-                    "padroes_ausencia": padroes_ausencia
-                }
-            )
+        Returns:
+            Tuple: (percentual de presença 0-100, disciplinas com falta na ordem
+            da primeira ausência, número de faltas de cada uma)
+        """
+        presencas = np.asarray(presencas, dtype=np.int8)
+        self._checar_alinhamento(presencas, disciplinas)
+        codigos, nomes = self._codificar_disciplinas(disciplinas)
+        total = presencas.shape[0]
+        
+        # Um aluno é uma coorte com um único intervalo de eventos, e os seus
+        # pares (aluno, disciplina) são as próprias disciplinas. A versão
+        # NumPy evita importar o Numba para uma varredura só
+        totais, contagens, primeira_falta = _varrer_presencas_numpy(
+            presencas,
+            codigos.astype(np.int64, copy=False),
+            np.array([0, total], dtype=np.int64),
+            len(nomes)
+        )
+        
+        percentual = (int(totais[0]) / total) * 100 if total > 0 else 0.0
+        nomes, contagens = self._ordenar_faltas(nomes, contagens, primeira_falta)
+        return percentual, nomes, contagens
+    
+    def _checar_alinhamento(self, presencas: np.ndarray, disciplinas: np.ndarray) -> None:
+        """
+        Garante que presenças e disciplinas descrevem os mesmos eventos.
+        
+        O kernel indexa os dois vetores pela mesma posição, sem checagem de
+        limites; vetores de tamanhos diferentes não podem chegar até ele.
         
-        except Exception as e:
-            return AgentResponse(
-                agent_name=self.nome,
-                status="erro",
-                resultado=f"Erro ao analisar engajamento: {str(e)}",
-                detalhes={"erro": str(e)}
+        Args:
+            presencas: Vetor de presenças
+            disciplinas: Disciplina de cada evento
+            
+        Raises:
+            ValueError: Se os vetores têm tamanhos diferentes
+        """
+        if len(presencas) != len(disciplinas):
+            raise ValueError(
+                f"'presencas' ({len(presencas)}) e 'disciplinas' ({len(disciplinas)}) "
+                "devem ter o mesmo tamanho"
             )
     
-    def _calcular_percentual_presenca(self, eventos: List[Dict[str, Any]]) -> float:
+    def _codificar_disciplinas(self, disciplinas: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Calcula o percentual de presença baseado nos eventos.
+        Codifica as disciplinas em inteiros 0..n-1 na ordem de aparição.
+        
+        Disciplinas nulas (None/NaN) viram um código próprio em vez do
+        sentinela -1, que sairia do intervalo esperado pelo kernel.
         
         Args:
-            eventos: Lista de eventos com informação de presença (0 ou 1)
+            disciplinas: Disciplina de cada evento
             
         Returns:
-            float: Percentual de presença (0-100)
+            Tuple: (código de cada evento, nome de cada código)
         """
-        if not eventos:
-            return 0.0
+        disciplinas = np.asarray(disciplinas, dtype=object)
+        codigos, nomes = pd.factorize(disciplinas, use_na_sentinel=False)
+        nomes = np.asarray(nomes, dtype=object)
         
-        presencas = sum(1 for evento in eventos if evento.get('presenca', 0) == 1)
-        total = len(eventos)
+        # O código nulo mantém o valor original do evento (ex.: None, e não NaN)
+        for codigo in np.flatnonzero(pd.isna(nomes)):
+            nomes[codigo] = disciplinas[int(np.argmax(codigos == codigo))]
         
-        return (presencas / total) * 100 if total > 0 else 0.0
+        return codigos, nomes
     
-    def _identificar_padroes_ausencia(self, eventos: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _ordenar_faltas(
+        self,
+        nomes: np.ndarray,
+        contagens: np.ndarray,
+        primeira_falta: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Identifica padrões de ausência nos eventos.
+        Mantém as disciplinas com falta, na ordem da primeira ausência.
         
         Args:
-            eventos: Lista de eventos
+            nomes: Nome de cada código de disciplina
+            contagens: Faltas por código de disciplina
+            primeira_falta: Posição da primeira falta de cada código
             
         Returns:
-            Dict: Dicionário com informações sobre padrões de ausência
+            Tuple: (disciplinas com falta, número de faltas de cada uma)
         """
-        ausencias_por_disciplina = {}
+        com_falta = np.flatnonzero(contagens)
+        ordem = com_falta[np.argsort(primeira_falta[com_falta], kind='stable')]
+        return nomes[ordem], contagens[ordem]
+    
+    def _ausencias_agregadas(
+        self,
+        eventos_por_disciplina: Dict[str, Dict[str, int]]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Deriva as faltas por disciplina das contagens já agregadas.
         
-        for evento in eventos:
-            if evento.get('presenca', 0) == 0:
-                disciplina = evento.get('disciplina', 'Desconhecida')
-                if disciplina not in ausencias_por_disciplina:
-                    ausencias_por_disciplina[disciplina] = 0
-                ausencias_por_disciplina[disciplina] += 1
+        Args:
+            eventos_por_disciplina: {disciplina: {'sum': presenças, 'count': aulas
+                com presença registrada}}
+            
+        Returns:
+            Tuple: (disciplinas com falta, número de faltas de cada uma)
+        """
+        nomes = np.empty(len(eventos_por_disciplina), dtype=object)
+        nomes[:] = list(eventos_por_disciplina)
+        contagens = np.array(
+            [c['count'] - c['sum'] for c in eventos_por_disciplina.values()],
+            dtype=np.int64
+        )
+        
+        com_falta = contagens > 0
+        return nomes[com_falta], contagens[com_falta]
+    
+    def _montar_detalhes(
+        self,
+        percentual: float,
+        nomes: np.ndarray,
+        contagens: np.ndarray
+    ) -> EngajamentoDetalhes:
+        """
+        Monta o registro de detalhes com os padrões de ausência.
         
-        return {
-            "total_ausencias": sum(ausencias_por_disciplina.values()),
-            "ausencias_por_disciplina": ausencias_por_disciplina
-        }
+        Args:
+            percentual: Percentual de presença
+            nomes: Disciplinas com falta
+            contagens: Número de faltas de cada disciplina
+            
+        Returns:
+            EngajamentoDetalhes: Detalhes da análise de engajamento
+        """
+        return EngajamentoDetalhes(
+            percentual_presenca=percentual,
+            total_ausencias=int(contagens.sum()),
+            ausencias_por_disciplina=dict(zip(nomes.tolist(), contagens.tolist()))
+        )
     
-    def _montar_resultado(self, percentual: float, padroes: Dict[str, Any]) -> str:
+    def _montar_resultado(
+        self,
+        percentual: float,
+        nomes: np.ndarray,
+        contagens: np.ndarray
+    ) -> str:
         """
         Monta o texto do resultado da análise.
         
         Args:
             percentual: Percentual de presença
-            padroes: Dicionário com padrões de ausência
+            nomes: Disciplinas com falta
+            contagens: Número de faltas de cada disciplina
             
         Returns:
             str: Texto formatado do resultado
         """
         resultado = f"Frequência de presença: {percentual:.1f}%. "
         
-        total_ausencias = padroes.get('total_ausencias', 0)
+        total_ausencias = int(contagens.sum())
         if total_ausencias > 0:
             resultado += f"Total de ausências identificadas: {total_ausencias}. "
             
-            ausencias_disciplina = padroes.get('ausencias_por_disciplina', {})
-            if ausencias_disciplina:
-                disciplina_maior_ausencia = max(ausencias_disciplina, key=ausencias_disciplina.get)
-                resultado += f"Maior concentração de ausências em: {disciplina_maior_ausencia}."
+            # argmax devolve o primeiro máximo: empate fica com a primeira ausência
+            disciplina_maior_ausencia = nomes[int(contagens.argmax())]
+            resultado += f"Maior concentração de ausências em: {disciplina_maior_ausencia}."
         else:
             resultado += "Nenhuma ausência registrada."
         
         return resultado
-
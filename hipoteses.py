@@ -0,0 +1,192 @@
+"""
+Módulo hipoteses.py - Regras de redação e refutação das hipóteses.
+
+Reúne a cascata de textos do diagnóstico e os testes de refutação do
+validador como funções totalmente anotadas, de argumentos primitivos e sem
+dependências do restante do pacote. Assim o módulo pode ser compilado com
+mypyc ('mypyc <pacote>/hipoteses.py', no diretório que contém o pacote): a
+extensão gerada fica ao lado deste arquivo e tem precedência na importação.
+Sem ela, o mesmo código roda como Python puro. 'COMPILADO' indica qual das
+duas versões foi carregada.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, Final, List, Tuple
+
+
+# Valores de cada HipoteseTag (diagnostico.py)
+DESENGAJAMENTO_GERAL: Final = 1
+DIFICULDADE_ESPECIFICA: Final = 2
+QUEDA_MODERADA: Final = 3
+ESTAVEL: Final = 4
+
+# A extensão compilada não é carregada a partir de um arquivo .py
+COMPILADO: Final = not __file__.endswith('.py')
+
+# Entradas guardadas por tabela de memorização
+TAMANHO_MEMO: Final = 4096
+
+
+@lru_cache(maxsize=TAMANHO_MEMO)
+def texto_hipotese(tag: int, disciplina_critica: str, ausencia_na_critica: bool) -> str:
+    """
+    Redige o texto de uma hipótese já classificada.
+    
+    Os argumentos determinam o texto por completo, então o resultado fica em
+    cache: alunos com o mesmo perfil reaproveitam o texto já montado.
+    
+    Args:
+        tag: Valor da HipoteseTag escolhida
+        disciplina_critica: Primeira disciplina crítica ('' se não houver)
+        ausencia_na_critica: Se há ausências registradas na disciplina crítica
+        
+    Returns:
+        str: Texto da hipótese diagnóstica
+    """
+    if tag == DESENGAJAMENTO_GERAL:
+        # Queda significativa e baixa frequência geral
+        return "Queda de rendimento geral por desengajamento."
+    if tag == DIFICULDADE_ESPECIFICA:
+        # Problema concentrado em uma disciplina
+        if ausencia_na_critica:
+            return f"Dificuldade específica em {disciplina_critica} com ausências concentradas."
+        return f"Dificuldade específica em {disciplina_critica}."
+    if tag == QUEDA_MODERADA:
+        # Queda moderada
+        return "Queda de rendimento com padrão de ausências seletivas."
+    # Desempenho estável ou leve queda
+    return "Desempenho relativamente estável com possível desengajamento em disciplinas específicas."
+
+
+def validar_hipotese(
+    tag: int,
+    queda_rendimento: float,
+    percentual_presenca: float,
+    disciplinas_criticas: List[str],
+    ausencias_disciplina: Dict[str, int]
+) -> Dict[str, Any]:
+    """
+    Aplica à hipótese o teste de refutação correspondente à sua tag.
+    
+    Os números só entram na validação pelas comparações dos testes e pelo
+    texto com uma casa decimal das evidências. A chave de memorização usa
+    exatamente esses valores, então alunos que coincidem neles reaproveitam a
+    validação sem que o resultado mude.
+    
+    Args:
+        tag: Valor da HipoteseTag a validar
+        queda_rendimento: Queda de rendimento do aluno
+        percentual_presenca: Percentual de presença do aluno
+        disciplinas_criticas: Disciplinas com média abaixo de 6.0
+        ausencias_disciplina: Faltas por disciplina
+        
+    Returns:
+        Dict: confirmada, nuances, evidencias, tipo_diagnostico e resultado
+    """
+    confirmada, tipo_diagnostico, nuances, evidencias, resultado = _validar_por_chave(
+        tag,
+        f"{queda_rendimento:.1f}",
+        f"{percentual_presenca:.1f}",
+        percentual_presenca > 60,
+        tuple(disciplinas_criticas),
+        bool(disciplinas_criticas) and disciplinas_criticas[0] in ausencias_disciplina
+    )
+    
+    # Listas novas a cada chamada: a entrada em cache nunca é exposta
+    return {
+        "confirmada": confirmada,
+        "nuances": list(nuances),
+        "evidencias": list(evidencias),
+        "tipo_diagnostico": tipo_diagnostico,
+        "resultado": resultado
+    }
+
+
+@lru_cache(maxsize=TAMANHO_MEMO)
+def _validar_por_chave(
+    tag: int,
+    queda_texto: str,
+    presenca_texto: str,
+    presenca_acima_60: bool,
+    disciplinas_criticas: Tuple[str, ...],
+    ausencia_na_critica: bool
+) -> Tuple[bool, str, Tuple[str, ...], Tuple[str, ...], str]:
+    """Valida um perfil de validação (resultado em cache; imutável)."""
+    if tag == DESENGAJAMENTO_GERAL:
+        confirmada, tipo_diagnostico, nuances, evidencias = _validar_desengajamento_geral(
+            queda_texto, presenca_texto, presenca_acima_60, disciplinas_criticas
+        )
+    elif tag == DIFICULDADE_ESPECIFICA:
+        confirmada, tipo_diagnostico, nuances, evidencias = _validar_dificuldade_especifica(
+            disciplinas_criticas, ausencia_na_critica
+        )
+    else:
+        # Hipóteses sem teste de refutação: aceitas como desempenho instável
+        confirmada, tipo_diagnostico, nuances, evidencias = True, "instavel", (), ()
+    
+    resultado = resultado_validacao(confirmada, list(nuances), list(evidencias))
+    return confirmada, tipo_diagnostico, nuances, evidencias, resultado
+
+
+def resultado_validacao(confirmada: bool, nuances: List[str], evidencias: List[str]) -> str:
+    """
+    Monta o texto do resultado da validação.
+    
+    Args:
+        confirmada: Se a hipótese foi confirmada
+        nuances: Nuances adicionadas pelo validador
+        evidencias: Evidências que sustentam a hipótese
+        
+    Returns:
+        str: Texto formatado do resultado
+    """
+    resultado = f"Hipótese validada: {confirmada}. "
+    if nuances:
+        resultado += f"Nuances: {' '.join(nuances)} "
+    if evidencias:
+        resultado += f"Evidências: {' '.join(evidencias)}"
+    return resultado
+
+
+def _validar_desengajamento_geral(
+    queda_texto: str,
+    presenca_texto: str,
+    presenca_acima_60: bool,
+    disciplinas_criticas: Tuple[str, ...]
+) -> Tuple[bool, str, Tuple[str, ...], Tuple[str, ...]]:
+    """Tenta refutar a hipótese de desengajamento geral."""
+    # Tenta refutar: verifica se é realmente geral
+    if len(disciplinas_criticas) == 1 and presenca_acima_60:
+        return (
+            False,
+            "pontual",
+            ("A hipótese de desengajamento geral é questionável. O problema parece concentrado em uma disciplina específica.",),
+            ()
+        )
+    return (
+        True,
+        "geral",
+        (),
+        (
+            f"Queda de {queda_texto} pontos confirma desempenho reduzido.",
+            f"Frequência de {presenca_texto}% indica baixo engajamento."
+        )
+    )
+
+
+def _validar_dificuldade_especifica(
+    disciplinas_criticas: Tuple[str, ...],
+    ausencia_na_critica: bool
+) -> Tuple[bool, str, Tuple[str, ...], Tuple[str, ...]]:
+    """Verifica se a dificuldade é realmente restrita a uma disciplina."""
+    if len(disciplinas_criticas) > 1:
+        return (
+            True,
+            "instavel",
+            ("Múltiplas disciplinas críticas sugerem que o problema pode ser mais amplo que uma dificuldade específica.",),
+            ()
+        )
+    evidencias: Tuple[str, ...] = (f"Disciplinas críticas identificadas: {', '.join(disciplinas_criticas)}",)
+    if ausencia_na_critica:
+        evidencias += (f"Ausências concentradas em {disciplinas_criticas[0]} reforçam a hipótese.",)
+    return True, "pontual", (), evidencias
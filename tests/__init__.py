@@ -0,0 +1,6 @@
+"""
+Testes do sistema multiagente.
+
+Executar a partir do diretório que contém o pacote:
+    python -m unittest discover -s <pacote>/tests -t .
+"""
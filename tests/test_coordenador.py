@@ -0,0 +1,105 @@
+"""
+Testes do CoordenadorAnalise: a análise de um aluno ('analisar') e a de uma
+coorte ('analisar_muitos') devem produzir o mesmo resultado.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from .. import coordenador
+from ..coordenador import CoordenadorAnalise
+
+
+CABECALHO = "id_aluno,nome_aluno,periodo_curso,id_disciplina,semestre_letivo,data_evento,tipo_evento,presenca,nota\n"
+
+# alu_900 tem faltas em aulas sem disciplina; alu_901 empata a disciplina
+# nula com MA202, com a primeira falta em MA202
+LINHAS_DISCIPLINA_NULA = """\
+alu_900,Teste Borda,3,CS101,2024.2,2024-09-20,prova,1,5.0
+alu_900,Teste Borda,3,MA202,2024.2,2024-09-21,prova,1,7.0
+alu_900,Teste Borda,3,,2024.2,2024-10-01,aula,0,
+alu_900,Teste Borda,3,MA202,2024.2,2024-10-02,aula,0,
+alu_900,Teste Borda,3,,2024.2,2024-10-03,aula,0,
+alu_900,Teste Borda,3,MA202,2024.2,2024-10-06,aula,1,
+alu_900,Teste Borda,2,CS101,2024.1,2024-05-10,prova,1,8.6
+alu_901,Outro Aluno,3,MA202,2024.2,2024-10-02,aula,0,
+alu_901,Outro Aluno,3,,2024.2,2024-10-03,aula,0,
+alu_901,Outro Aluno,3,CS101,2024.2,2024-10-04,aula,1,
+alu_901,Outro Aluno,3,CS101,2024.2,2024-09-20,prova,1,7.0
+"""
+
+# alu_902 tem aulas sem registro de presença: contam no percentual, mas não
+# como faltas
+LINHAS_PRESENCA_NULA = """\
+alu_902,Sem Registro,3,CS101,2024.2,2024-10-01,aula,,
+alu_902,Sem Registro,3,CS101,2024.2,2024-10-02,aula,,
+alu_902,Sem Registro,3,MA202,2024.2,2024-10-03,aula,0,
+alu_902,Sem Registro,3,MA202,2024.2,2024-10-04,aula,1,
+alu_902,Sem Registro,3,MA202,2024.2,2024-09-20,prova,1,7.0
+"""
+
+
+class TestAnaliseIndividualECoorte(unittest.TestCase):
+    """Compara 'analisar' e 'analisar_muitos' sobre o mesmo dataset."""
+    
+    def setUp(self):
+        arquivo = tempfile.NamedTemporaryFile(
+            'w', suffix='.csv', delete=False, encoding='utf-8'
+        )
+        with arquivo:
+            arquivo.write(CABECALHO + LINHAS_DISCIPLINA_NULA + LINHAS_PRESENCA_NULA)
+        self.caminho = arquivo.name
+        self.addCleanup(os.remove, self.caminho)
+    
+    def _analisar_um(self, id_aluno):
+        """Analisa o aluno com um coordenador novo (sem cache)."""
+        resposta = CoordenadorAnalise(self.caminho).analisar({'id_aluno': id_aluno})
+        self.assertEqual(resposta.status, "sucesso", resposta.resultado)
+        return resposta.detalhes
+    
+    def test_disciplina_nula_conta_nas_ausencias(self):
+        detalhes = self._analisar_um('alu_900')
+        relatorio = detalhes['processoDeAnalise']['relatorioEngajamento']
+        self.assertIn("Total de ausências identificadas: 3.", relatorio)
+        self.assertIn("Maior concentração de ausências em: nan.", relatorio)
+    
+    def test_presenca_nula_nao_conta_como_falta(self):
+        detalhes = self._analisar_um('alu_902')
+        relatorio = detalhes['processoDeAnalise']['relatorioEngajamento']
+        self.assertIn("Frequência de presença: 25.0%.", relatorio)
+        self.assertIn("Total de ausências identificadas: 1.", relatorio)
+        self.assertIn("Maior concentração de ausências em: MA202.", relatorio)
+    
+    def test_analisar_e_analisar_muitos_coincidem(self):
+        ids = ['alu_900', 'alu_901', 'alu_902']
+        em_lote = CoordenadorAnalise(self.caminho).analisar_muitos(ids)
+        
+        for id_aluno, resultado_lote in zip(ids, em_lote):
+            with self.subTest(id_aluno=id_aluno):
+                resultado_um = self._analisar_um(id_aluno)
+                # A data da análise depende do instante de cada coordenador
+                resultado_um.pop('dataAnalise')
+                resultado_lote = dict(resultado_lote)
+                resultado_lote.pop('dataAnalise')
+                # NaN só é igual a si mesmo pela serialização
+                self.assertEqual(
+                    json.dumps(resultado_um, default=str, sort_keys=True),
+                    json.dumps(resultado_lote, default=str, sort_keys=True)
+                )
+    
+    def test_data_analise_e_tomada_a_cada_chamada(self):
+        analise = CoordenadorAnalise(self.caminho)
+        with mock.patch.object(coordenador, '_data_atual', return_value='2030-01-02T00:00:00Z'):
+            resultado_um = analise.analisar({'id_aluno': 'alu_900'}).detalhes
+            resultado_lote = analise.analisar_muitos(['alu_901', 'alu_902'])
+        
+        self.assertEqual(resultado_um['dataAnalise'], '2030-01-02T00:00:00Z')
+        for resultado in resultado_lote:
+            self.assertEqual(resultado['dataAnalise'], '2030-01-02T00:00:00Z')
+
+
+if __name__ == '__main__':
+    unittest.main()
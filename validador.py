@@ -5,8 +5,10 @@ Este agente recebe a hipótese do Agente de Diagnóstico e tenta refutá-la
 ou confirmá-la, adicionando nuances importantes à análise.
 """
 
-from typing import Dict, Any
-from .base import Agent, AgentResponse
+from typing import Dict, Any, Optional
+from .base import Agent, AgentResponse, DesempenhoDetalhes, EngajamentoDetalhes
+from .diagnostico import HipoteseTag
+from .hipoteses import validar_hipotese
 
 
 class ValidadorHipoteses(Agent):
@@ -20,6 +22,8 @@ class ValidadorHipoteses(Agent):
     - Confirma ou refina a hipótese
     """
     
+    PREFIXO_ERRO = "Erro ao validar hipótese"
+    
     def __init__(self):
         super().__init__("Validador de Hipóteses")
     
@@ -30,100 +34,104 @@ class ValidadorHipoteses(Agent):
         Args:
             dados: Dicionário contendo:
                 - 'hipotese': Hipótese do Agente de Diagnóstico
-                - 'detalhes_desempenho': Detalhes da análise de desempenho
-                - 'detalhes_engajamento': Detalhes da análise de engajamento
+                - 'tag_hipotese': HipoteseTag da hipótese (opcional; sem ela,
+                  a hipótese é classificada pelo texto)
+                - 'detalhes_desempenho': DesempenhoDetalhes do AnalisadorDesempenho
+                - 'detalhes_engajamento': EngajamentoDetalhes do AnalisadorEngajamento
                 
         Returns:
             AgentResponse: Validação e refinamento da hipótese
         """
-        try:
-            hipotese = dados.get('hipotese', '')
-            detalhes_desempenho = dados.get('detalhes_desempenho', {})
-            detalhes_engajamento = dados.get('detalhes_engajamento', {})
-            
-            # Valida a hipótese
-            validacao = self._validar_hipotese(
-                hipotese,
-                detalhes_desempenho,
-                detalhes_engajamento
-            )
-            
-            return AgentResponse(
-                agent_name=self.nome,
-                status="sucesso",
-                resultado=validacao['resultado'],
-                detalhes={
-                    "confirmada": validacao['confirmada'],
-                    "nuances": validacao['nuances'],
-                    "evidencias": validacao['evidencias']
-                }
-            )
+        # Valida as entradas antes de confrontar a hipótese
+        erro = self._validar_entrada(dados)
+        if erro is not None:
+            return erro
+        
+        hipotese = dados.get('hipotese', '')
+        tag_hipotese = dados.get('tag_hipotese')
+        detalhes_desempenho = dados.get('detalhes_desempenho') or DesempenhoDetalhes()
+        detalhes_engajamento = dados.get('detalhes_engajamento') or EngajamentoDetalhes()
+        
+        # Valida a hipótese
+        validacao = self._validar_hipotese(
+            hipotese,
+            tag_hipotese,
+            detalhes_desempenho,
+            detalhes_engajamento
+        )
+        
+        # O dicionário da validação (já novo a cada chamada) vira os detalhes
+        resultado = validacao.pop('resultado')
         
-        except Exception as e:
-            return AgentResponse(
-                agent_name=self.nome,
-                status="erro",
-                resultado=f"Erro ao validar hipótese: {str(e)}",
-                detalhes={"erro": str(e)}
-            )
+        return AgentResponse(
+            agent_name=self.nome,
+            status="sucesso",
+            resultado=resultado,
+            detalhes=validacao
+        )
+    
+    def _validar_entrada(self, dados: Dict[str, Any]) -> Optional[AgentResponse]:
+        """
+        Verifica as entradas de 'analisar'.
+        
+        Args:
+            dados: Dicionário de entrada do agente
+            
+        Returns:
+            Optional[AgentResponse]: Resposta de erro, ou None se as entradas são válidas
+        """
+        return (
+            self._exigir_tipo(dados, 'hipotese', str, "um texto")
+            or self._exigir_tipo(dados, 'tag_hipotese', (HipoteseTag, type(None)), "uma HipoteseTag")
+            or self._exigir_tipo(dados, 'detalhes_desempenho', DesempenhoDetalhes, "um DesempenhoDetalhes")
+            or self._exigir_tipo(dados, 'detalhes_engajamento', EngajamentoDetalhes, "um EngajamentoDetalhes")
+        )
     
     def _validar_hipotese(
         self,
         hipotese: str,
-        detalhes_desempenho: Dict[str, Any],
-        detalhes_engajamento: Dict[str, Any]
+        tag_hipotese: Optional[HipoteseTag],
+        desempenho: DesempenhoDetalhes,
+        engajamento: EngajamentoDetalhes
     ) -> Dict[str, Any]:
         """
         Valida a hipótese e adiciona nuances.
         
         Args:
             hipotese: Hipótese a ser validada
-            detalhes_desempenho: Detalhes de desempenho
-            detalhes_engajamento: Detalhes de engajamento
+            tag_hipotese: Tag da hipótese (None para classificar pelo texto)
+            desempenho: Detalhes de desempenho
+            engajamento: Detalhes de engajamento
             
         Returns:
             Dict: Resultado da validação com nuances
         """
-        confirmada = True
-        nuances = []
-        evidencias = []
-        
-        # Extrai dados para análise
-        queda_rendimento = detalhes_desempenho.get('queda_rendimento', 0)
-        percentual_presenca = detalhes_engajamento.get('percentual_presenca', 100)
-        disciplinas_criticas = detalhes_desempenho.get('disciplinas_criticas', [])
-        ausencias_disciplina = detalhes_engajamento.get('padroes_ausencia', {}).get('ausencias_por_disciplina', {})
-        
-        # Lógica de validação
-        if "desengajamento geral" in hipotese.lower():
-            # Tenta refutar: verifica se é realmente geral
-            if len(disciplinas_criticas) == 1 and percentual_presenca > 60:
-                confirmada = False
-                nuances.append("A hipótese de desengajamento geral é questionável. O problema parece concentrado em uma disciplina específica.")
-            else:
-                evidencias.append(f"Queda de {queda_rendimento:.1f} pontos confirma desempenho reduzido.")
-                evidencias.append(f"Frequência de {percentual_presenca:.1f}% indica baixo engajamento.")
+        if tag_hipotese is None:
+            tag_hipotese = self._tag_pelo_texto(hipotese)
         
-        elif "dificuldade específica" in hipotese.lower():
-            # Valida: verifica se realmente é específica
-            if len(disciplinas_criticas) > 1:
-                nuances.append("Múltiplas disciplinas críticas sugerem que o problema pode ser mais amplo que uma dificuldade específica.")
-            else:
-                evidencias.append(f"Disciplinas críticas identificadas: {', '.join(disciplinas_criticas)}")
-                if disciplinas_criticas[0] in ausencias_disciplina:
-                    evidencias.append(f"Ausências concentradas em {disciplinas_criticas[0]} reforçam a hipótese.")
-        
-        # Monta o resultado
-        resultado = f"Hipótese validada: {confirmada}. "
-        if nuances:
-            resultado += f"Nuances: {' '.join(nuances)} "
-        if evidencias:
-            resultado += f"Evidências: {' '.join(evidencias)}"
+        # Lógica de validação: teste de refutação da tag da hipótese
+        # (memorizado por perfil de validação)
+        return validar_hipotese(
+            tag_hipotese,
+            desempenho.queda_rendimento,
+            engajamento.percentual_presenca,
+            desempenho.disciplinas_criticas,
+            engajamento.ausencias_por_disciplina
+        )
+    
+    def _tag_pelo_texto(self, hipotese: str) -> HipoteseTag:
+        """
+        Classifica uma hipótese recebida apenas como texto.
         
-        return {
-            "resultado": resultado,
-            "confirmada": confirmada,
-            "nuances": nuances,
-            "evidencias": evidencias
-        }
-
+        Args:
+            hipotese: Texto da hipótese
+            
+        Returns:
+            HipoteseTag: Tag correspondente (ESTAVEL quando não reconhecida)
+        """
+        hipotese_minuscula = hipotese.lower()
+        if "desengajamento geral" in hipotese_minuscula:
+            return HipoteseTag.DESENGAJAMENTO_GERAL
+        if "dificuldade específica" in hipotese_minuscula:
+            return HipoteseTag.DIFICULDADE_ESPECIFICA
+        return HipoteseTag.ESTAVEL